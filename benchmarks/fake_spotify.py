@@ -0,0 +1,337 @@
+"""Local stand-in for the parts of the Spotify Web API used by the game.
+
+Serves a synthetic catalog over HTTP with configurable latency, jitter and
+rate limiting, so the game can be measured against big accounts and slow
+networks. Start it alone with:
+
+    python benchmarks/fake_spotify.py --port 8765 --latency 0.1 --tracks 10000
+
+and point a client at it with client_for(url).
+"""
+
+import argparse
+import json
+import random
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from models.client import RateLimitedSpotify, TokenBucket  # noqa: E402
+
+
+class Catalog:
+    """Synthetic playlists, tracks are generated on demand"""
+
+    def __init__(self, playlists, other_playlists=20, seed=0):
+        self.seed = seed
+        self.playlists = []
+        for index, (name, total) in enumerate(playlists):
+            self.playlists.append(self.playlist(f"mbt{index:04d}", name, total))
+        for index in range(other_playlists):
+            self.playlists.append(
+                self.playlist(f"other{index:04d}", f"Other {index}", 30)
+            )
+        self.by_id = {playlist["id"]: playlist for playlist in self.playlists}
+
+    def playlist(self, playlist_id, name, total):
+        return {
+            "id": playlist_id,
+            "name": name,
+            "uri": f"spotify:playlist:{playlist_id}",
+            "snapshot_id": f"{playlist_id}-snapshot-1",
+            "tracks": {"total": total},
+            "owner": {"id": "benchmark"},
+        }
+
+    def track(self, playlist_id, index):
+        rng = random.Random(f"{self.seed}-{playlist_id}-{index}")
+        artist_id = rng.randrange(500)
+        year = rng.randrange(1960, 2025)
+        track_id = f"{playlist_id}t{index:06d}"
+        images = [
+            {
+                "url": f"https://i.scdn.co/image/{track_id}{size}",
+                "height": size,
+                "width": size,
+            }
+            for size in (640, 300, 64)
+        ]
+        artists = [
+            {
+                "id": f"artist{artist_id}",
+                "name": f"Artist {artist_id}",
+                "uri": f"spotify:artist:artist{artist_id}",
+                "external_urls": {
+                    "spotify": f"https://open.spotify.com/artist/artist{artist_id}"
+                },
+            }
+        ]
+        return {
+            "added_at": "2024-01-01T00:00:00Z",
+            "track": {
+                "id": track_id,
+                "uri": f"spotify:track:{track_id}",
+                "name": f"Song {index}",
+                "duration_ms": rng.randrange(120000, 300000),
+                "artists": artists,
+                "album": {
+                    "name": f"Album {artist_id}-{year}",
+                    "release_date": f"{year}-{rng.randrange(1, 13):02d}-01",
+                    "images": images,
+                    "artists": artists,
+                    "available_markets": ["FR", "BE", "CH", "CA", "US", "GB", "DE"],
+                    "external_urls": {
+                        "spotify": f"https://open.spotify.com/album/{track_id}"
+                    },
+                },
+            },
+        }
+
+
+class FakeSpotify:
+    """State of the fake API, shared by the request handlers"""
+
+    def __init__(
+        self,
+        catalog,
+        latency=0.0,
+        jitter=0.0,
+        rate_limit=0.0,
+        retry_after=1,
+        devices=("Living room", "Kitchen"),
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.devices = [
+            {
+                "id": f"device{index}",
+                "name": name,
+                "is_active": index == 0,
+                "type": "Speaker",
+            }
+            for index, name in enumerate(devices)
+        ]
+        self.playback = {"is_playing": False, "item": None, "device": self.devices[0]}
+        self.recently_played = []
+        self.events = []
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    def record(self, name, **details):
+        with self.lock:
+            self.events.append((time.perf_counter(), name, details))
+
+    def events_named(self, name):
+        with self.lock:
+            return [event for event in self.events if event[1] == name]
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(
+                max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+            )
+
+    def page(self, items, total, query, default_limit):
+        limit = int(query.get("limit", default_limit))
+        offset = int(query.get("offset", 0))
+        return {
+            "items": items(offset, min(offset + limit, total)),
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+        }
+
+    def get(self, path, query, body):
+        if path in ("/v1/me", "/v1/me/"):
+            return {"id": "benchmark", "display_name": "Benchmark"}
+        if path == "/v1/me/playlists":
+            playlists = self.catalog.playlists
+            return self.page(
+                lambda start, end: playlists[start:end], len(playlists), query, 20
+            )
+        match = re.fullmatch(r"/v1/playlists/(\w+)/(items|tracks)", path)
+        if match:
+            playlist = self.catalog.by_id[match.group(1)]
+            return self.page(
+                lambda start, end: [
+                    self.catalog.track(playlist["id"], index)
+                    for index in range(start, end)
+                ],
+                playlist["tracks"]["total"],
+                query,
+                100,
+            )
+        if path == "/v1/me/player/devices":
+            return {"devices": self.devices}
+        if path == "/v1/me/player":
+            with self.lock:
+                return dict(self.playback, timestamp=int(time.time() * 1000))
+        if path == "/v1/me/player/recently-played":
+            return {"items": self.recently_played[: int(query.get("limit", 20))]}
+        return None
+
+    def put(self, path, query, body):
+        device_id = query.get("device_id")
+        if path == "/v1/me/player/play":
+            with self.lock:
+                if body.get("uris"):
+                    self.playback["item"] = {"uri": body["uris"][0]}
+                self.playback["is_playing"] = True
+            self.record("play", device_id=device_id, uris=body.get("uris"))
+            return True
+        if path == "/v1/me/player/pause":
+            with self.lock:
+                self.playback["is_playing"] = False
+            self.record("pause", device_id=device_id)
+            return True
+        if path == "/v1/me/player":
+            device_id = body["device_ids"][0]
+            with self.lock:
+                for device in self.devices:
+                    device["is_active"] = device["id"] == device_id
+                    if device["is_active"]:
+                        self.playback["device"] = device
+            self.record("transfer", device_id=device_id)
+            return True
+        return None
+
+    def post(self, path, query, body):
+        if path == "/v1/me/player/queue":
+            self.record("queue", uri=query.get("uri"))
+            return True
+        return None
+
+    def start(self, host="127.0.0.1", port=0):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle_request(self, method):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                body = json.loads(raw_body) if raw_body.strip() else {}
+
+                with api.lock:
+                    api.requests += 1
+                api.delay()
+                if api.rate_limit and random.random() < api.rate_limit:
+                    with api.lock:
+                        api.throttled += 1
+                    self.reply(
+                        429,
+                        {
+                            "error": {
+                                "status": 429,
+                                "message": "API rate limit exceeded",
+                            }
+                        },
+                        {"Retry-After": str(api.retry_after)},
+                    )
+                    return
+
+                result = getattr(api, method)(url.path, query, body)
+                if result is None:
+                    self.reply(404, {"error": {"status": 404, "message": "Not found"}})
+                elif result is True:
+                    self.reply(204, None)
+                else:
+                    self.reply(200, result)
+
+            def reply(self, status, payload, headers=None):
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.handle_request("get")
+
+            def do_PUT(self):
+                self.handle_request("put")
+
+            def do_POST(self):
+                self.handle_request("post")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def client_for(url, **kwargs):
+    """Return a client like the game's one, talking to the fake API at url"""
+    bucket = TokenBucket(
+        kwargs.pop("rate", config.API_RATE),
+        kwargs.pop("burst", config.API_BURST),
+        kwargs.pop("cooldown", config.API_THROTTLE_COOLDOWN),
+    )
+    sp = RateLimitedSpotify(bucket, auth="benchmark-token", **kwargs)
+    sp.prefix = f"{url}/v1/"
+    return sp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds, +/-")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 probability")
+    parser.add_argument(
+        "--tracks", type=int, default=10000, help="size of the biggest playlist"
+    )
+    parser.add_argument(
+        "--playlists", type=int, default=30, help="number of mbt_ playlists"
+    )
+    args = parser.parse_args()
+
+    sizes = [args.tracks] + [
+        random.Random(index).randrange(20, 500) for index in range(args.playlists - 1)
+    ]
+    catalog = Catalog(
+        [(f"mbt_Playlist {index}", size) for index, size in enumerate(sizes)]
+    )
+    api = FakeSpotify(catalog, args.latency, args.jitter, args.rate_limit)
+    api.start(args.host, args.port)
+    print(f"Fake Spotify API listening on {api.url}/v1/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure App.show_frame time when cycling through the settings pages.
+
+Needs a display. Run from the repository root:
+
+    python benchmarks/page_switch.py [switches]
+"""
+
+import os
+import statistics
+import sys
+import time
+from tkinter import Tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from models import App  # noqa: E402
+
+PAGES = ["StartPage", "SettingPage", "PlayerPage", "SettingPage"]
+
+
+def main(switches=400):
+    # The pages below never call Spotify, dummy credentials are enough
+    os.environ.setdefault("SPOTIPY_CLIENT_ID", "benchmark")
+    os.environ.setdefault("SPOTIPY_CLIENT_SECRET", "benchmark")
+    os.environ.setdefault("SPOTIPY_REDIRECT_URI", "http://127.0.0.1:9090")
+
+    root = Tk()
+    root.geometry(f"{config.SCREEN_WIDTH}x{config.SCREEN_HEIGHT}+10+10")
+    app = App(root)
+    for page_name in PAGES:
+        app.show_frame(page_name)
+    root.update()
+
+    durations = []
+    for index in range(switches):
+        page_name = PAGES[index % len(PAGES)]
+        start = time.perf_counter()
+        app.show_frame(page_name)
+        root.update_idletasks()
+        durations.append(time.perf_counter() - start)
+    root.destroy()
+
+    durations.sort()
+    print(f"page switches: {switches}")
+    print(f"mean: {statistics.mean(durations) * 1000:.3f} ms")
+    print(f"p50:  {durations[len(durations) // 2] * 1000:.3f} ms")
+    print(f"p95:  {durations[int(len(durations) * 0.95)] * 1000:.3f} ms")
+    print(f"max:  {durations[-1] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,257 @@
+"""End-to-end benchmarks against the local fake Spotify API.
+
+Reports playlist load time (first song, cold and from the disk cache), menu
+render time (when a display is available), round start latency and
+buzz-to-pause latency, and writes them as JSON so two versions can be
+compared. Run from the repository root:
+
+    python benchmarks/run.py --latency 0.08 --jitter 0.03 --tracks 10000
+    python benchmarks/run.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from fake_spotify import Catalog, FakeSpotify, client_for  # noqa: E402
+from models.spotify import SpotifyManager  # noqa: E402
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+managers = []
+
+
+def summary(durations):
+    if not durations:
+        return None
+    durations = sorted(durations)
+    return {
+        "count": len(durations),
+        "mean": statistics.mean(durations),
+        "p50": durations[len(durations) // 2],
+        "p95": durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        "max": durations[-1],
+    }
+
+
+def new_manager(url):
+    manager = SpotifyManager()
+    manager._sp = client_for(url)
+    managers.append(manager)
+    return manager
+
+
+def wait_for_event(api, name, count, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        events = api.events_named(name)
+        if len(events) > count:
+            return events[count][0]
+        time.sleep(0.0005)
+    raise TimeoutError(f"No {name} request received")
+
+
+def measure_playlist_load(url):
+    manager = new_manager(url)
+    manager.invalidate_catalog_cache()
+
+    start = time.perf_counter()
+    playlists = manager.refresh()
+    listing = time.perf_counter() - start
+
+    biggest = max(playlists, key=lambda playlist: playlist.number_of_songs)
+    start = time.perf_counter()
+    biggest.current_song
+    first_song = time.perf_counter() - start
+    songs = len(biggest.songs)
+    cold = time.perf_counter() - start
+
+    # A new manager only has the disk cache to start from
+    manager = new_manager(url)
+    playlist = next(p for p in manager.refresh() if p.uri == biggest.uri)
+    start = time.perf_counter()
+    playlist.songs
+    warm = time.perf_counter() - start
+    return {
+        "playlists": len(playlists),
+        "songs": songs,
+        "listing": listing,
+        "first_song": first_song,
+        "cold": cold,
+        "warm": warm,
+    }
+
+
+def measure_menu_render(url):
+    try:
+        from tkinter import Tk, TclError
+
+        root = Tk()
+    except TclError as error:
+        return {"skipped": str(error)}
+
+    from models import App
+
+    app = App(root)
+    app.spotify_manager._sp = client_for(url)
+    start = time.perf_counter()
+    app.show_frame("PlaylistChoicePage")
+    root.update_idletasks()
+    duration = time.perf_counter() - start
+    root.destroy()
+    return {"first_render": duration}
+
+
+def measure_rounds(url, api, rounds):
+    manager = new_manager(url)
+    manager.devices
+    playlist = max(manager.refresh(), key=lambda playlist: playlist.number_of_songs)
+    manager.set_playlist(playlist)
+    playlist.songs
+
+    round_start = []
+    buzz_to_pause = []
+    for index in range(rounds):
+        count = len(api.events_named("play"))
+        start = time.perf_counter()
+        playlist.play()
+        round_start.append(wait_for_event(api, "play", count) - start)
+
+        count = len(api.events_named("pause"))
+        start = time.perf_counter()
+        playlist.pause()
+        buzz_to_pause.append(wait_for_event(api, "pause", count) - start)
+        playlist.next_song()
+    return {
+        "round_start": summary(round_start),
+        "buzz_to_pause": summary(buzz_to_pause),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    # Keep the user cache and credentials out of the benchmark
+    config.CATALOG_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "catalog.sqlite3")
+    os.environ.setdefault("SPOTIPY_CLIENT_ID", "benchmark")
+    os.environ.setdefault("SPOTIPY_CLIENT_SECRET", "benchmark")
+    os.environ.setdefault("SPOTIPY_REDIRECT_URI", "http://127.0.0.1:9090")
+
+    sizes = [args.tracks] + [200] * (args.playlists - 1)
+    catalog = Catalog(
+        [(f"mbt_Playlist {index}", size) for index, size in enumerate(sizes)]
+    )
+    api = FakeSpotify(catalog, args.latency, args.jitter, args.rate_limit)
+    url = api.start()
+    try:
+        results = {
+            "playlist_load": measure_playlist_load(url),
+            "menu_render": measure_menu_render(url),
+        }
+        results.update(measure_rounds(url, api, args.rounds))
+        results["requests"] = api.requests
+        results["throttled"] = api.throttled
+    finally:
+        api.stop()
+    client_stats = {}
+    for manager in managers:
+        for name, value in manager.client_stats().items():
+            client_stats[name] = client_stats.get(name, 0) + value
+    results["client"] = client_stats
+
+    return {
+        "revision": git_revision(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "scenario": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "rate_limit": args.rate_limit,
+            "tracks": args.tracks,
+            "playlists": args.playlists,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+
+
+def flatten(data, prefix=""):
+    values = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(old_path, new_path):
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old = flatten(json.load(old_file)["results"])
+        new = flatten(json.load(new_file)["results"])
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{key:40} {old[key]:12.4f} {new[key]:12.4f} {change:+8.1f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="seconds per request"
+    )
+    parser.add_argument("--jitter", type=float, default=0.02, help="seconds, +/-")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 probability")
+    parser.add_argument(
+        "--tracks", type=int, default=10000, help="size of the biggest playlist"
+    )
+    parser.add_argument(
+        "--playlists", type=int, default=30, help="number of mbt_ playlists"
+    )
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--output", help="JSON file, default benchmarks/results/<revision>-<date>.json"
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files"
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+        name = (
+            f"{report['revision'] or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        output = os.path.join(RESULTS_DIRECTORY, name)
+    with open(output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Simulate games on the headless GameEngine, without display nor Spotify.
+
+Players buzz after a random reaction time and answer right with a given
+probability. Prints the simulation speed and the average scores, which
+helps tuning config.BONUS_TIERS. Run from the repository root:
+
+    python benchmarks/simulate.py [rounds] [players]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.game import GameEngine  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePlayback:
+    def __init__(self, songs):
+        self.songs = songs
+        self.current_index = 0
+        self.commands = 0
+
+    @property
+    def is_over(self):
+        return self.current_index + 1 >= self.songs
+
+    def next_song(self):
+        self.current_index += 1
+
+    def play(self, callback=None):
+        self.commands += 1
+
+    def pause(self):
+        self.commands += 1
+
+    def resume(self):
+        self.commands += 1
+
+
+def simulate(rounds, players, seed=0):
+    rng = random.Random(seed)
+    clock = FakeClock()
+    scores = [0] * players
+    skill = [rng.uniform(0.3, 0.9) for player in range(players)]
+    speed = [rng.uniform(1.5, 8.0) for player in range(players)]
+    engine = GameEngine(players, scores, FakePlayback(rounds), clock=clock)
+
+    while True:
+        engine.start_round()
+        for attempt in range(players):
+            reaction_times = [rng.expovariate(1 / s) for s in speed]
+            player = min(range(players), key=reaction_times.__getitem__)
+            clock.now += reaction_times[player]
+            engine.buzz(player)
+            if rng.random() < skill[player]:
+                engine.right_answer(complete=rng.random() < 0.3)
+                break
+            engine.wrong_answer()
+        else:
+            engine.skip()
+        if not engine.next_round():
+            return scores
+
+
+def main(rounds=100000, players=4):
+    start = time.perf_counter()
+    scores = simulate(rounds, players)
+    duration = time.perf_counter() - start
+    print(f"rounds: {rounds} in {duration:.2f} s ({rounds / duration:.0f} rounds/s)")
+    for player, score in enumerate(scores):
+        print(f"player {player + 1}: {score} ({score / rounds:.2f} per round)")
+    print(f"spread: {statistics.pstdev(scores) / rounds:.3f} per round")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""Memory used by the songs of a playlist, per representation.
+
+Compares the former SpotifySong (a plain object holding its playlist,
+manager, client and album dict), a list of slotted SpotifySong and the
+columnar SongStore, for songs decoded from the JSON catalog cache like
+the game does. Run from the repository root:
+
+    python benchmarks/song_memory.py [tracks] [playlists]
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_spotify import Catalog  # noqa: E402
+from models.songs import SongStore, SpotifySong  # noqa: E402
+from models.spotify import SpotifyPlaylist  # noqa: E402
+
+
+class Playlist:
+    """What the former SpotifySong referenced from its playlist"""
+
+    def __init__(self):
+        self.manager = object()
+        self.sp = object()
+
+
+class LegacySong:
+    def __init__(self, playlist, uri, name, album, release_date, artist):
+        self.playlist = playlist
+        self.manager = playlist.manager
+        self.sp = playlist.sp
+        self.uri = uri
+        self.name = name
+        self.album = album
+        self.release_date = release_date
+        self.artist = artist
+
+
+def legacy_songs(items):
+    playlist = Playlist()
+    songs = []
+    for item in items:
+        track = item["track"]
+        album = track["album"]
+        artist = " & ".join([x["name"] for x in track["artists"]])
+        songs.append(
+            LegacySong(
+                playlist,
+                track["uri"],
+                track["name"],
+                album,
+                album["release_date"],
+                artist,
+            )
+        )
+    return songs
+
+
+def slotted_songs(items):
+    return [SpotifySong(*row) for row in SpotifyPlaylist.parse_items(items)]
+
+
+def song_store(items):
+    return SongStore(SpotifyPlaylist.parse_items(items))
+
+
+def measure(build, blobs):
+    """Bytes still allocated by build(items) once the raw items are dropped"""
+    tracemalloc.start()
+    kept = []
+    for blob in blobs:
+        items = json.loads(blob)
+        kept.append(build(items))
+        del items
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main():
+    tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    playlists = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    catalog = Catalog([(f"mbt_Playlist {index}", tracks) for index in range(playlists)])
+    blobs = [
+        json.dumps([catalog.track(playlist["id"], index) for index in range(tracks)])
+        for playlist in catalog.playlists[:playlists]
+    ]
+
+    songs = tracks * playlists
+    print(f"{playlists} playlists of {tracks} songs")
+    print(f"{'representation':16} {'kept':>10} {'per song':>10} {'peak':>10}")
+    for name, build in (
+        ("legacy", legacy_songs),
+        ("slotted", slotted_songs),
+        ("columnar", song_store),
+    ):
+        current, peak = measure(build, blobs)
+        print(
+            f"{name:16} {current / 2**20:8.1f} MB {current / songs:8.0f} B"
+            f" {peak / 2**20:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
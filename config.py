@@ -2,3 +2,78 @@
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
 SCREEN_TITLE = "Musical Blind Test"
+
+# Nombre de playlists affichées à la fois dans le menu de choix
+PLAYLIST_MENU_ROWS = 6
+
+# Cache disque des morceaux de playlist (None = ~/.cache/musical-blind-test)
+CATALOG_CACHE_PATH = None
+
+# Nombre de pages de l'API Spotify téléchargées en parallèle
+PAGE_FETCH_WORKERS = 8
+
+# Durée de validité (en secondes) de la liste des playlists
+PLAYLISTS_TTL = 300
+
+# Ajoute le prochain morceau à la file d'attente pendant le compte à rebours
+PREWARM_QUEUE_TRACK = False
+
+# Effets sonores : nombre d'effets joués en même temps et délai (en secondes)
+# pendant lequel un même effet répété n'est joué qu'une fois
+SOUND_CHANNELS = 8
+SOUND_MERGE_WINDOW = 0.08
+
+# Fenêtre (en ms) pendant laquelle les buzzers quasi simultanés sont départagés
+BUZZER_ARBITRATION_MS = 30
+
+# Pause (en secondes) après une mauvaise réponse avant la reprise du morceau
+WRONG_ANSWER_PENALTY = 1
+
+# Bonus de rapidité : (limite en secondes, points) pour un buzz avant la limite
+BONUS_TIERS = [(4, 5)]
+
+# Mesures de performance : nombre de mesures gardées par opération, seuils
+# (en secondes) au-delà desquels un appel est signalé comme lent, fichier
+# JSON lines où elles sont écrites (touche F12 ou à la fermeture du jeu)
+METRICS_HISTORY = 1000
+SLOW_SPOTIFY_CALL = 0.5
+SLOW_KEY_HANDLER = 0.05
+METRICS_PATH = "metrics.jsonl"
+VENUE = ""
+
+# Limite côté client des appels à l'API Spotify, appliquée seulement après une
+# réponse 429 : appels par seconde, rafale et durée (en secondes) de la limite
+API_RATE = 10
+API_BURST = 20
+API_THROTTLE_COOLDOWN = 30
+
+# Le jeton Spotify est renouvelé en tâche de fond ce nombre de secondes
+# avant son expiration
+TOKEN_REFRESH_MARGIN = 300
+
+# Surveillance des appareils Spotify : intervalle de scrutation (en secondes)
+# et appareil utilisé quand celui choisi disparaît (None = l'appareil actif)
+DEVICE_POLL_MIN = 2
+DEVICE_POLL_MAX = 30
+FALLBACK_DEVICE_NAME = None
+
+# État de lecture Spotify : intervalle d'échantillonnage (en secondes) pendant
+# une manche et en dehors, âge maximal avant de le considérer inconnu, délai
+# après une commande pendant lequel un état qui la contredit est ignoré
+PLAYBACK_POLL_ACTIVE = 1
+PLAYBACK_POLL_IDLE = 15
+PLAYBACK_STATE_MAX_AGE = 3
+PLAYBACK_COMMAND_GRACE = 2
+
+# Chargement en tâche de fond des playlists après la connexion : nombre de
+# playlists chargées en même temps, nombre d'écoutes récentes consultées pour
+# charger d'abord les playlists jouées récemment. Cet ordre demande l'accès aux
+# écoutes récentes : l'activer oblige à se connecter à nouveau à Spotify
+PREFETCH_WORKERS = 2
+RECENTLY_PLAYED_LIMIT = 50
+PREFETCH_RECENTLY_PLAYED = False
+
+# Partie rapide : nombre de morceaux tirés au hasard dans la playlist, attente
+# maximale (en secondes) du tirage avant d'afficher qu'aucun morceau n'est prêt
+QUICK_GAME_SONGS = 20
+QUICK_GAME_SAMPLE_TIMEOUT = 10
@@ -1,4 +1,5 @@
 import config
+import logging
 from tkinter import Tk
 from dotenv import load_dotenv
 from models import App
@@ -6,6 +7,9 @@ from models import App
 
 if __name__ == "__main__":
     load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
     root = Tk()
     root.geometry(
         f"{config.SCREEN_WIDTH}x{config.SCREEN_HEIGHT}+10+10"
@@ -13,5 +17,8 @@ if __name__ == "__main__":
     root.title = config.SCREEN_TITLE
 
     app = App(root)
+    # Warm up the playlists at once when a Spotify token is already cached
+    app.spotify_manager.start_prefetch()
 
     root.mainloop()
+    app.dump_metrics()
@@ -1,4 +1,7 @@
+import config
+import logging
 from tkinter import Frame
+from utils import Scheduler, TaskRunner, metrics, play_sound, sound_engine
 from .spotify import SpotifyManager
 from .views import (
     StartPage,
@@ -11,16 +14,24 @@ from .views import (
     SplashPage,
     ScorePage,
 )
-from utils import play_sound
+
+logger = logging.getLogger(__name__)
 
 
 class App:
     def __init__(self, root):
         self.root = root
+        sound_engine.start()
         self._padx = 50
         self._pady = 50
         self.spotify_manager = SpotifyManager()
+        # Every timer of the game, pages get their own group of it
+        self.scheduler = Scheduler(self.root)
+        self.spotify_manager.dispatcher.attach(self.scheduler)
+        self.tasks = TaskRunner(self.scheduler, self.spotify_manager.dispatcher)
         self.players = 2
+        # Number of random songs played in a quick game, None plays them all
+        self.quick_game_songs = None
         self.reset_score()
 
         container = Frame(self.root)
@@ -51,11 +62,14 @@ class App:
             # will be the one that is visible.
             frame.grid(row=0, column=0, sticky="nsew")
 
+        self.spotify_manager.device_watcher.add_listener(self.devices_changed)
+        self.spotify_manager.prefetcher.add_listener(self.prefetch_progress)
         self.show_frame("StartPage")
 
         self.root.bind("<Up>", lambda event: self.navigate_up())
         self.root.bind("<Down>", lambda event: self.navigate_down())
         self.root.bind("<KeyPress>", lambda event: self.key_pressed(event))
+        self.root.bind("<F12>", lambda event: self.dump_metrics())
 
     def reset_score(self):
         scores = []
@@ -65,21 +79,40 @@ class App:
 
     def show_frame(self, page_name):
         """Show a frame for the given page name"""
+        previous_frame = self.active_frame
         self.active_frame = self.frames[page_name]
-        for frame in self.frames.values():
-            if frame != self.active_frame:
-                frame.hide()
+        if previous_frame is not None and previous_frame != self.active_frame:
+            previous_frame.hide()
         if page_name in ["ReadyPage", "GamePage"]:
             self.active_frame.reset_setup()
         self.active_frame.show()
 
+    def timed_handler(self, name):
+        page_name = type(self.active_frame).__name__
+        return metrics.timed(f"{name}.{page_name}", config.SLOW_KEY_HANDLER)
+
+    def devices_changed(self, devices):
+        for frame in self.frames.values():
+            frame.devices_changed(devices)
+
+    def prefetch_progress(self, progress):
+        for frame in self.frames.values():
+            frame.prefetch_progress(progress)
+
     def navigate_up(self):
-        play_sound("./sounds/navigation.wav")
-        self.active_frame.navigate_up()
+        with self.timed_handler("navigate_up"):
+            play_sound("./sounds/navigation.wav")
+            self.active_frame.navigate_up()
 
     def navigate_down(self):
-        play_sound("./sounds/navigation.wav")
-        self.active_frame.navigate_down()
+        with self.timed_handler("navigate_down"):
+            play_sound("./sounds/navigation.wav")
+            self.active_frame.navigate_down()
 
     def key_pressed(self, event):
-        self.active_frame.key_pressed(event)
+        with self.timed_handler("key_pressed"):
+            self.active_frame.key_pressed(event)
+
+    def dump_metrics(self):
+        metrics.dump(config.METRICS_PATH)
+        logger.info("Live timers: %d", self.scheduler.live)
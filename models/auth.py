@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRefresher:
+    """Keep the OAuth token in memory and renew it ahead of its expiry.
+
+    Used as the client auth manager: API calls read the in-memory token
+    while a background thread refreshes it `margin` seconds before it
+    expires, so no call has to wait on a refresh.
+    """
+
+    def __init__(self, auth_manager, margin=300, retry_delay=30):
+        self.auth_manager = auth_manager
+        self.margin = margin
+        self.retry_delay = retry_delay
+        self.token_info = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Read the cached token once and start the refresher thread"""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self.token_info = self.auth_manager.get_cached_token()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return self.token_info
+
+    def set_token(self, token_info):
+        self.token_info = token_info
+        self._wakeup.set()
+
+    def is_expired(self, token_info):
+        return token_info is None or token_info["expires_at"] <= time.time()
+
+    @property
+    def is_logged_in(self):
+        self.load()
+        return not self.is_expired(self.token_info)
+
+    def get_access_token(self, as_dict=False):
+        token_info = self.load()
+        if self.is_expired(token_info):
+            # Not logged in or the refresh failed: let spotipy handle it inline
+            self.auth_manager.get_access_token(as_dict=False)
+            token_info = self.auth_manager.get_cached_token()
+            self.set_token(token_info)
+        return token_info if as_dict else token_info["access_token"]
+
+    def refresh(self):
+        token_info = self.token_info
+        self.set_token(
+            self.auth_manager.refresh_access_token(token_info["refresh_token"])
+        )
+        logger.info("Spotify token refreshed")
+
+    def _run(self):
+        while True:
+            token_info = self.token_info
+            if token_info is None or not token_info.get("refresh_token"):
+                delay = None
+            else:
+                delay = token_info["expires_at"] - self.margin - time.time()
+            if delay is None or delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+            try:
+                self.refresh()
+            except Exception as error:  # network errors must not stop the thread
+                logger.warning("Spotify token refresh failed: %s", error)
+                self._wakeup.wait(self.retry_delay)
+                self._wakeup.clear()
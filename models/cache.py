@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "musical-blind-test", "catalog.sqlite3")
+
+
+class CatalogCache:
+    """Parsed playlist songs stored on disk, keyed by playlist uri.
+
+    An entry is only valid for the snapshot_id it was stored with, so a
+    playlist edited on Spotify is fetched again on next load. Entries
+    written with another SCHEMA_VERSION are dropped when the cache opens.
+    """
+
+    # Songs are stored as [uri, name, artist, year] rows since version 2
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, closing(self._connect()) as conn, conn:
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != self.SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS playlists")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS playlists ("
+                "uri TEXT PRIMARY KEY, "
+                "snapshot_id TEXT NOT NULL, "
+                "songs BLOB NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def load(self, uri, snapshot_id):
+        if snapshot_id is None:
+            return None
+        with self._lock, closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT songs FROM playlists WHERE uri = ? AND snapshot_id = ?",
+                (uri, snapshot_id),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def store(self, uri, snapshot_id, rows):
+        if snapshot_id is None:
+            return
+        blob = zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 1)
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO playlists VALUES (?, ?, ?, ?)",
+                (uri, snapshot_id, blob, time.time()),
+            )
+
+    def invalidate(self, uri=None):
+        with self._lock, closing(self._connect()) as conn, conn:
+            if uri is None:
+                cursor = conn.execute("DELETE FROM playlists")
+            else:
+                cursor = conn.execute("DELETE FROM playlists WHERE uri = ?", (uri,))
+            return cursor.rowcount
+
+    @property
+    def stats(self):
+        with self._lock, closing(self._connect()) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(songs)), 0) FROM playlists"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class NullCache:
+    """Stand-in used when the catalog cache cannot be opened"""
+
+    path = None
+    hits = 0
+    misses = 0
+
+    def load(self, uri, snapshot_id):
+        return None
+
+    def store(self, uri, snapshot_id, rows):
+        pass
+
+    def invalidate(self, uri=None):
+        return 0
+
+    @property
+    def stats(self):
+        return {"path": None, "entries": 0, "bytes": 0, "hits": 0, "misses": 0}
+
+
+def open_catalog_cache(path=None):
+    """Return a CatalogCache, or a NullCache if it cannot be opened"""
+    try:
+        return CatalogCache(path)
+    except (OSError, sqlite3.Error) as error:
+        logger.warning("Catalog cache disabled: %s", error)
+        return NullCache()
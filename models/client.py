@@ -0,0 +1,152 @@
+import threading
+import time
+import requests
+import spotipy
+from spotipy.exceptions import SpotifyException
+
+HIGH_PRIORITY = 0
+LOW_PRIORITY = 1
+
+
+class TokenBucket:
+    """Client side rate limit shared by every thread using the client.
+
+    Calls are not limited until Spotify answers with a 429. Nobody gets a
+    token before its Retry-After delay is over, then the bucket enforces
+    rate and burst for cooldown seconds. A low priority caller only gets a
+    token when no high priority caller is waiting.
+    """
+
+    def __init__(self, rate, burst, cooldown=30):
+        self.rate = rate
+        self.capacity = burst
+        self.cooldown = cooldown
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled_until = 0.0
+        self.waiting = [0, 0]
+        self._condition = threading.Condition()
+
+    def refill(self, now):
+        if now <= self.updated:  # still inside a Retry-After delay
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=LOW_PRIORITY):
+        """Take a token, return the time spent waiting for it"""
+        start = time.monotonic()
+        with self._condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.refill(now)
+                    ahead = priority == LOW_PRIORITY and self.waiting[HIGH_PRIORITY]
+                    if now >= self.throttled_until and not ahead:
+                        return now - start
+                    if now >= self.blocked_until and self.tokens >= 1 and not ahead:
+                        self.tokens -= 1
+                        return now - start
+                    delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                    self._condition.wait(max(delay, 0.001))
+            finally:
+                self.waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def block(self, seconds):
+        with self._condition:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self.throttled_until = max(
+                self.throttled_until, self.blocked_until + self.cooldown
+            )
+            # Start again slowly once the Retry-After delay is over
+            self.tokens = 0
+            self.updated = self.blocked_until
+            self._condition.notify_all()
+
+
+class RateLimitedSpotify(spotipy.Spotify):
+    """spotipy client going through a TokenBucket on a pooled session.
+
+    Player endpoints get the high priority so playback control never waits
+    behind catalog loading. A 429 reply blocks the bucket for the
+    Retry-After delay and the call is retried.
+    """
+
+    def __init__(self, bucket, pool_size=10, max_rate_limit_retries=5, **kwargs):
+        self.bucket = bucket
+        self.pool_size = pool_size
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "throttle_waits": 0,
+            "throttle_wait_time": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+        # 429 are handled here with the bucket, not slept on by urllib3
+        kwargs.setdefault("status_forcelist", (500, 502, 503, 504))
+        super().__init__(**kwargs)
+
+    def _build_session(self):
+        super()._build_session()
+        retry = self._session.get_adapter("https://").max_retries
+        retry = retry.new(respect_retry_after_header=False)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=2, pool_maxsize=self.pool_size, max_retries=retry
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def count(self, name, value=1):
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def _internal_call(self, method, url, payload, params):
+        if url.startswith("me/player") and not url.startswith(
+            "me/player/recently-played"
+        ):
+            priority = HIGH_PRIORITY
+        else:
+            priority = LOW_PRIORITY
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire(priority)
+            self.count("calls")
+            if waited > 0.001:
+                self.count("throttle_waits")
+                self.count("throttle_wait_time", waited)
+            try:
+                return super()._internal_call(method, url, payload, dict(params))
+            except SpotifyException as error:
+                if error.http_status != 429 or attempt >= self.max_rate_limit_retries:
+                    raise
+                headers = error.headers or {}
+                self.bucket.block(float(headers.get("Retry-After", 1)))
+                self.count("retries")
+                attempt += 1
+
+    @property
+    def connection_stats(self):
+        """Requests sent and connections opened by the session pools"""
+        sent = 0
+        opened = 0
+        adapters = set(self._session.adapters.values())
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    sent += pool.num_requests
+                    opened += pool.num_connections
+        return {"requests": sent, "connections": opened, "reused": sent - opened}
+
+    @property
+    def client_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update(self.connection_stats)
+        return stats
@@ -0,0 +1,62 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceWatcher:
+    """Poll the Spotify devices in the background and report changes.
+
+    The poll interval doubles while the list stays the same, up to
+    max_interval, and drops back to min_interval after a change or an
+    error. Listeners are called on the Tk thread with the new list. When
+    the chosen device disappears, the manager fails over to another one.
+    """
+
+    def __init__(self, manager, min_interval=2, max_interval=30):
+        self.manager = manager
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.listeners = []
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def poll_now(self):
+        self.interval = self.min_interval
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                devices = self.manager.sp.devices()["devices"]
+            except Exception as error:  # keep watching through network errors
+                logger.warning("Device polling failed: %s", error)
+                self.interval = self.min_interval
+                continue
+
+            if self.signature(devices) == self.signature(self.manager._devices):
+                self.interval = min(self.interval * 2, self.max_interval)
+                continue
+            self.interval = self.min_interval
+            self.manager.update_devices(devices)
+            for listener in self.listeners:
+                self.manager.dispatcher.call_soon(listener, devices)
+
+    @staticmethod
+    def signature(devices):
+        if devices is None:
+            return None
+        return [
+            (device["id"], device["name"], device["is_active"]) for device in devices
+        ]
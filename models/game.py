@@ -0,0 +1,92 @@
+import time
+from .helpers import Stopwatch, bonus_for
+
+RIGHT_ANSWER_SCORE = 10
+COMPLETE_ANSWER_SCORE = 5
+WRONG_ANSWER_SCORE = -5
+
+
+class GameEngine:
+    """Round logic of the blind test, without any widget.
+
+    playback is anything with play/pause/resume/next_song and is_over, such
+    as SpotifyPlaylist. timer is anything with start/pause(at)/resume,
+    elapsed and buzz_time, by default a Stopwatch on the given clock. Each
+    action returns False when it is not allowed in the current status.
+    """
+
+    def __init__(self, players, scores, playback, timer=None, clock=time.perf_counter):
+        self.players = players
+        self.scores = scores
+        self.playback = playback
+        self.timer = timer if timer is not None else Stopwatch(clock)
+        self.player_colors = ["black"] * players
+        self.status = "waiting"
+        # Whatever the last playback call returned, e.g. a PlaybackCommand
+        self.last_command = None
+
+    def start_round(self, callback=None):
+        self.status = "playing"
+        self.player_colors = ["black"] * self.players
+        self.last_command = self.playback.play(callback=callback)
+        self.timer.start()
+
+    def buzz(self, player, pressed_at=None):
+        """Give the hand to player, timing stops at pressed_at when given"""
+        if self.status != "playing" or self.player_colors[player] == "red":
+            return False
+        self.player_colors[player] = "green"
+        self.status = "pause"
+        self.timer.pause(pressed_at)
+        self.last_command = self.playback.pause()
+        return True
+
+    def wrong_answer(self):
+        if self.status != "pause":
+            return False
+        self.update_scores(WRONG_ANSWER_SCORE)
+        self.player_colors = ["black"] * self.players
+        self.last_command = self.playback.resume()
+        self.timer.resume()
+        self.status = "playing"
+        return True
+
+    def right_answer(self, complete=False):
+        if self.status != "pause":
+            return False
+        self.status = "score"
+        self.last_command = self.playback.resume()
+        add_score = RIGHT_ANSWER_SCORE + self.bonus
+        if complete:
+            add_score += COMPLETE_ANSWER_SCORE
+        self.update_scores(add_score)
+        return True
+
+    def skip(self):
+        if self.status != "playing":
+            return False
+        self.status = "skip"
+        self.timer.pause()
+        return True
+
+    @property
+    def bonus(self):
+        return bonus_for(self.timer.buzz_time)
+
+    @property
+    def can_go_next(self):
+        return self.status in ["score", "skip"]
+
+    def next_round(self):
+        """Move to the next song, return False when the game is over"""
+        self.status = "waiting"
+        if self.playback.is_over:
+            return False
+        self.playback.next_song()
+        return True
+
+    def update_scores(self, to_add):
+        for index, color in enumerate(self.player_colors):
+            if color == "green":
+                current_score = self.scores[index]
+                self.scores[index] = max(0, current_score + to_add)
@@ -1,27 +1,32 @@
-import datetime
+import config
+import time
+from bisect import bisect_left
 
 
 class CountDown:
-    def __init__(self, element, actions, time=3):
+    def __init__(self, element, actions, time=3, timers=None, name="countdown"):
         self.element = element
         self.init_time = time
         self.time = time
         self.actions = actions
+        self.timers = timers
+        self.name = name
         self.element.configure(text=f"{self.time}")
 
+    def count(self):
+        new_time = self.time - 1
+        if new_time < 0:
+            self.timers.cancel(self.name)
+            for action in self.actions:
+                action()
+        else:
+            self.time = new_time
+            self.element.configure(text=f"{self.time}")
+
     def run(self):
-        def count():
-            new_time = self.time - 1
-            if new_time < 0:
-                self.element.after_cancel(self.after)
-                for action in self.actions:
-                    action()
-            else:
-                self.time = new_time
-                self.element.configure(text=f"{self.time}")
-                self.after = self.element.after(1000, count)
-
-        count()
+        # Starting again replaces the running countdown
+        self.timers.every(self.name, 1, self.count)
+        self.count()
 
     def start(self):
         self.run()
@@ -30,43 +35,185 @@ class CountDown:
         self.time = self.init_time
 
 
+class PrefixIndex:
+    """Items sorted by name, to find those whose name starts with a prefix.
+
+    search returns a range of positions in items, found by bisection, so
+    neither the lookup nor its result depend on the number of items.
+    """
+
+    def __init__(self, items, name):
+        self.items = sorted(items, key=lambda item: name(item).casefold())
+        self.keys = [name(item).casefold() for item in self.items]
+
+    def search(self, prefix):
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        if not prefix:
+            return range(start, len(self.keys))
+        after = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return range(start, bisect_left(self.keys, after, start))
+
+
+class Stopwatch:
+    """Measure running time on a monotonic clock, across pauses.
+
+    Every paused segment is kept in a ledger, so the elapsed time is not
+    affected by wall clock changes nor by how often it is read.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.ledger = []
+        self.started_at = None
+        # Elapsed time when the last pause was taken, e.g. at a buzz
+        self.buzz_time = 0.0
+
+    @property
+    def running(self):
+        return self.started_at is not None
+
+    @property
+    def elapsed(self):
+        elapsed = sum(end - start for start, end in self.ledger)
+        if self.running:
+            elapsed += self.clock() - self.started_at
+        return elapsed
+
+    def start(self):
+        self.ledger = []
+        self.started_at = self.clock()
+        self.buzz_time = 0.0
+
+    def pause(self, at=None):
+        """Stop counting, at the given clock time if it is in the past"""
+        if self.running:
+            now = self.clock()
+            end = now if at is None else min(max(at, self.started_at), now)
+            self.ledger.append((self.started_at, end))
+            self.started_at = None
+            self.buzz_time = self.elapsed
+
+    def resume(self):
+        if not self.running:
+            self.started_at = self.clock()
+
+
+def bonus_for(seconds, tiers=None):
+    """Return the bonus of the first (limit, bonus) tier with seconds < limit"""
+    if tiers is None:
+        tiers = config.BONUS_TIERS
+    for limit, bonus in sorted(tiers):
+        if seconds < limit:
+            return bonus
+    return 0
+
+
 class Chronometer:
-    def __init__(self, element):
+    def __init__(self, element, timers, clock=time.perf_counter, name="chronometer"):
         self.element = element
-        self.duration_at_pause = None
-        self.duration = None
+        self.timers = timers
+        self.name = name
+        self.stopwatch = Stopwatch(clock)
+        self.text = None
+
+    @property
+    def elapsed(self):
+        return self.stopwatch.elapsed
+
+    @property
+    def buzz_time(self):
+        """Elapsed seconds at the key press that paused the round"""
+        return self.stopwatch.buzz_time
 
     @property
     def bonus(self):
-        total_seconds = int(self.duration.total_seconds())
-        if total_seconds < 4:
-            return 5
-        else:
-            return 0
+        return bonus_for(self.buzz_time)
+
+    def redraw(self):
+        text = f"{self.stopwatch.elapsed:.1f} s"
+        if text != self.text:
+            self.text = text
+            self.element.configure(text=text)
 
     def run(self):
-        def count():
-            self.duration = datetime.datetime.now() - self.start_time
-            if self.duration_at_pause:
-                self.duration += self.duration_at_pause
-            total_seconds = self.duration.total_seconds()
-            self.element.configure(text=f"{total_seconds:.1f} s")
-            self.after = self.element.after(100, count)
-
-        count()
-
-    def pause(self):
-        if self.duration_at_pause is None:
-            self.duration_at_pause = datetime.datetime.now() - self.start_time
-        else:
-            duration = datetime.datetime.now() - self.start_time
-            self.duration_at_pause += duration
-        if self.after:
-            self.element.after_cancel(self.after)
+        self.timers.every(self.name, 0.1, self.redraw)
+        self.redraw()
+
+    def cancel(self):
+        self.timers.cancel(self.name)
+
+    def pause(self, at=None):
+        self.stopwatch.pause(at)
+        self.cancel()
+        self.redraw()
 
     def start(self):
-        self.start_time = datetime.datetime.now()
+        self.stopwatch.start()
         self.run()
 
     def resume(self):
-        self.start()
+        self.stopwatch.resume()
+        self.run()
+
+
+class BuzzerArbiter:
+    """Give the buzz to the player who pressed first, not who was handled first.
+
+    Presses are ordered by the key event timestamp. The first press opens a
+    short window collecting near-simultaneous presses, then the earliest one
+    wins. Reaction times are measured from playback start.
+    """
+
+    def __init__(self, timers, on_winner, window=30, name="arbiter"):
+        self.timers = timers
+        self.on_winner = on_winner
+        self.window = window
+        self.name = name
+        self.clock_offset = None
+        self.start_round()
+
+    def start_round(self):
+        self.cancel()
+        self.candidates = {}
+        self.reaction_times = {}
+        self.playback_started_at = time.perf_counter()
+
+    def cancel(self):
+        self.timers.cancel(self.name)
+
+    def timestamp(self, event):
+        """Convert the event time (ms, arbitrary origin) to perf_counter seconds"""
+        now = time.perf_counter() * 1000
+        offset = now - event.time
+        # The smallest offset seen is the one with the least dispatch delay;
+        # a much bigger one means the 32 bits event clock wrapped around.
+        if (
+            self.clock_offset is None
+            or offset < self.clock_offset
+            or offset - self.clock_offset > 60 * 1000
+        ):
+            self.clock_offset = offset
+        return (event.time + self.clock_offset) / 1000
+
+    def record(self, player, event):
+        pressed_at = self.timestamp(event)
+        if player not in self.reaction_times:
+            self.reaction_times[player] = pressed_at - self.playback_started_at
+        return pressed_at
+
+    def buzz(self, player, event):
+        pressed_at = self.record(player, event)
+        if player in self.candidates:
+            return
+        self.candidates[player] = pressed_at
+        if len(self.candidates) == 1:
+            self.timers.schedule(self.name, self.window / 1000, self.resolve)
+
+    def resolve(self):
+        if not self.candidates:
+            return
+        winner = min(self.candidates, key=self.candidates.get)
+        pressed_at = self.candidates[winner]
+        self.candidates = {}
+        self.on_winner(winner, pressed_at)
@@ -0,0 +1,270 @@
+import config
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PlaybackCommand:
+    def __init__(self, action, uri=None, callback=None):
+        self.action = action
+        self.uri = uri
+        self.callback = callback
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.done_at = None
+        self.error = None
+        self.skipped = False
+        # Set to the command itself once it has been sent or skipped
+        self.future = Future()
+
+    @property
+    def target_state(self):
+        return "pause" if self.action == "pause" else "play"
+
+    @property
+    def latency(self):
+        """Time spent in the Spotify call"""
+        if self.started_at is None or self.done_at is None:
+            return None
+        return self.done_at - self.started_at
+
+    @property
+    def delay(self):
+        """Time between submission and completion"""
+        if self.done_at is None:
+            return None
+        return self.done_at - self.submitted_at
+
+
+class PlaybackWorker:
+    """Send playback commands to Spotify from a dedicated thread.
+
+    Commands waiting in the queue are collapsed before being sent: a play
+    supersedes everything queued before it, and a run of pause/resume
+    only sends the last one, if it changes the playback state at all.
+    Callbacks are run on the Tk thread through the manager dispatcher.
+    The time spent in each Spotify call and since submission is recorded
+    in utils.metrics as playback.<action> and playback.<action>.delay.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._commands = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def submit(self, action, uri=None, callback=None):
+        command = PlaybackCommand(action, uri, callback)
+        self.start()
+        self._commands.put(command)
+        return command
+
+    def prepare(self, uri, callback=None):
+        return self.submit("prepare", uri, callback)
+
+    def play(self, uri, callback=None):
+        return self.submit("play", uri, callback)
+
+    def pause(self, callback=None):
+        return self.submit("pause", callback=callback)
+
+    def resume(self, callback=None):
+        return self.submit("resume", callback=callback)
+
+    def collapse(self, commands):
+        """Return the commands to send, marking the others as skipped"""
+        to_send = [command for command in commands if command.action == "prepare"]
+        commands = [command for command in commands if command.action != "prepare"]
+        if not commands:
+            return to_send
+        start = 0
+        state = self.manager.playback_state.state
+        for index, command in enumerate(commands):
+            if command.action == "play":
+                start = index
+        if commands[start].action == "play":
+            to_send.append(commands[start])
+            state = "play"
+            start += 1
+
+        last_toggle = None
+        for command in commands[start:]:
+            last_toggle = command
+        if last_toggle is not None and last_toggle.target_state != state:
+            to_send.append(last_toggle)
+
+        for command in commands:
+            if command not in to_send:
+                command.skipped = True
+        return to_send
+
+    def resolve_uri(self, command):
+        return command.uri() if callable(command.uri) else command.uri
+
+    def _run(self):
+        while True:
+            commands = [self._commands.get()]
+            while True:
+                try:
+                    commands.append(self._commands.get_nowait())
+                except queue.Empty:
+                    break
+
+            for command in self.collapse(commands):
+                self.execute(command)
+            for command in commands:
+                if command.skipped:
+                    command.done_at = time.perf_counter()
+                if command.callback is not None:
+                    self.manager.dispatcher.call_soon(command.callback, command)
+                command.future.set_result(command)
+
+    def execute(self, command):
+        sp = self.manager.sp
+        device_id = self.manager.device_id
+        command.started_at = time.perf_counter()
+        try:
+            if command.action == "prepare":
+                uri = self.resolve_uri(command)
+                self.wake_device(device_id)
+                if config.PREWARM_QUEUE_TRACK:
+                    sp.add_to_queue(uri, device_id=device_id)
+            elif command.action == "play":
+                uri = self.resolve_uri(command)
+                sp.start_playback(device_id=device_id, uris=[uri])
+                self.manager.playback_state.applied("play", uri)
+            elif command.action == "pause":
+                sp.pause_playback(device_id=device_id)
+                self.manager.playback_state.applied("pause")
+            else:
+                sp.start_playback(device_id=device_id)
+                self.manager.playback_state.applied("play")
+        except Exception as error:  # the worker must survive network errors
+            command.error = error
+            logger.warning("Playback %s failed: %s", command.action, error)
+        command.done_at = time.perf_counter()
+        metrics.record(f"playback.{command.action}", command.latency)
+        metrics.record(f"playback.{command.action}.delay", command.delay)
+
+    def wake_device(self, device_id, attempts=5):
+        """Make sure the device is the active one, so play starts at once"""
+        if device_id is None:
+            return False
+        sp = self.manager.sp
+        for attempt in range(attempts):
+            for device in sp.devices()["devices"]:
+                if device["id"] == device_id and device["is_active"]:
+                    return True
+            if attempt == 0:
+                sp.transfer_playback(device_id, force_play=False)
+            time.sleep(0.2)
+        logger.warning("Device %s did not become active", device_id)
+        return False
+
+
+class PlaybackReconciler:
+    """Authoritative playback state, sampled from Spotify in the background.
+
+    current_playback() is polled every active_interval seconds while a round
+    is running and every idle_interval seconds otherwise. Commands sent by
+    the worker update the state right away; a sample started before the
+    last command is dropped since it may not include it, and so is a sample
+    contradicting it within grace seconds, since Spotify reports commands
+    with a lag. The state is reported as unknown once it is older than
+    max_age.
+    """
+
+    def __init__(
+        self, manager, active_interval=1, idle_interval=15, max_age=3, grace=2
+    ):
+        self.manager = manager
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.max_age = max_age
+        self.grace = grace
+        self.round_active = False
+        self.is_playing = None
+        self.track_uri = None
+        self.device_id = None
+        self.updated_at = None
+        # Last state set by a command, and when
+        self.applied_state = None
+        self.applied_at = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.updated_at is None or self.is_playing is None:
+                return None
+            if time.monotonic() - self.updated_at > self.max_age:
+                return None
+            return "play" if self.is_playing else "pause"
+
+    def set_round_active(self, active):
+        self.round_active = active
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def applied(self, state, uri=None):
+        with self._lock:
+            self.is_playing = state == "play"
+            if uri is not None:
+                self.track_uri = uri
+            self.updated_at = time.monotonic()
+            self.applied_state = state
+            self.applied_at = self.updated_at
+
+    def sample(self):
+        started_at = time.monotonic()
+        playback = self.manager.sp.current_playback()
+        with self._lock:
+            if self.updated_at is not None and self.updated_at > started_at:
+                return
+            is_playing = playback is not None and playback["is_playing"]
+            if self.lagging(is_playing):
+                return
+            if playback is None:
+                # Nothing is playing on any device
+                self.is_playing = False
+                self.track_uri = None
+                self.device_id = None
+            else:
+                self.is_playing = playback["is_playing"]
+                self.track_uri = (playback.get("item") or {}).get("uri")
+                self.device_id = (playback.get("device") or {}).get("id")
+            self.updated_at = time.monotonic()
+
+    def lagging(self, is_playing):
+        """Whether a sample contradicts a command Spotify may not report yet"""
+        if self.applied_at is None or time.monotonic() - self.applied_at > self.grace:
+            return False
+        return is_playing != (self.applied_state == "play")
+
+    def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as error:  # keep sampling through network errors
+                logger.warning("Playback state sampling failed: %s", error)
+            if self.round_active:
+                interval = self.active_interval
+            else:
+                interval = self.idle_interval
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
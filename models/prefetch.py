@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+RECENTLY_PLAYED_SCOPE = "user-read-recently-played"
+
+
+class PrefetchProgress:
+    def __init__(self, done=0, total=None, paused=False, finished=False):
+        self.done = done
+        self.total = total
+        self.paused = paused
+        self.finished = finished
+
+    @property
+    def text(self):
+        if self.total is None:
+            return "listing playlists"
+        if self.finished:
+            return f"{self.total} playlists ready"
+        text = f"loading playlists {self.done}/{self.total}"
+        if self.paused:
+            text += ", paused"
+        return text
+
+
+class PlaylistPrefetcher:
+    """Load the songs of every game playlist in the background after login.
+
+    Playlists are loaded most recently played first when the token grants
+    the listening history, at most workers at a time. While a round is
+    active, every page request waits before it is sent, so the game calls
+    never compete with the prefetch, unless the page belongs to the
+    playlist being played. Listeners are called on the Tk thread with a
+    PrefetchProgress.
+    """
+
+    def __init__(self, manager, workers=2, recently_played_limit=50):
+        self.manager = manager
+        self.workers = workers
+        self.recently_played_limit = recently_played_limit
+        self.listeners = []
+        self.progress = None
+        self._lock = threading.Lock()
+        self._allowed = threading.Event()
+        self._allowed.set()
+        self._thread = None
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def pause(self):
+        self._allowed.clear()
+        self.report()
+
+    def resume(self):
+        self._allowed.set()
+        self.report()
+
+    @property
+    def paused(self):
+        return not self._allowed.is_set()
+
+    def report(self, **changes):
+        with self._lock:
+            if self.progress is None:
+                return
+            for name, value in changes.items():
+                setattr(self.progress, name, value)
+            self.progress.paused = self.paused
+            progress = PrefetchProgress(**vars(self.progress))
+        for listener in self.listeners:
+            self.manager.dispatcher.call_soon(listener, progress)
+
+    def recently_played_uris(self):
+        """Playlist uris from the listening history, most recent first"""
+        if not self.manager.has_scope(RECENTLY_PLAYED_SCOPE):
+            return []
+        try:
+            history = self.manager.sp.current_user_recently_played(
+                limit=self.recently_played_limit
+            )
+        except Exception as error:  # ordering is a nice to have
+            logger.warning("Listening history unavailable: %s", error)
+            return []
+        uris = []
+        for item in history["items"]:
+            context = item.get("context") or {}
+            uri = context.get("uri")
+            if context.get("type") == "playlist" and uri not in uris:
+                uris.append(uri)
+        return uris
+
+    def ordered(self, playlists):
+        ranks = {uri: rank for rank, uri in enumerate(self.recently_played_uris())}
+        return sorted(
+            playlists, key=lambda playlist: ranks.get(playlist.uri, len(ranks))
+        )
+
+    def _run(self):
+        with self._lock:
+            self.progress = PrefetchProgress()
+        self.report()
+        try:
+            playlists = self.ordered(self.manager.playlists)
+        except Exception as error:  # retried on next start
+            logger.warning("Prefetch listing failed: %s", error)
+            with self._lock:
+                self.progress = None
+                self._thread = None
+            for listener in self.listeners:
+                self.manager.dispatcher.call_soon(listener, None)
+            return
+        self.report(total=len(playlists))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.load, playlist) for playlist in playlists]
+            for _ in as_completed(futures):
+                with self._lock:
+                    self.progress.done += 1
+                self.report()
+        self.report(finished=True)
+
+    def paused_fetch(self, playlist):
+        """playlist.fetch_page, waiting while a round plays another playlist"""
+
+        def fetch(limit, offset):
+            if playlist is not self.manager.active_playlist:
+                self._allowed.wait()
+            return playlist.fetch_page(limit, offset)
+
+        return fetch
+
+    def load(self, playlist):
+        self._allowed.wait()
+        try:
+            playlist.preload(self.paused_fetch(playlist))
+            playlist.songs
+        except Exception as error:  # one playlist must not stop the others
+            logger.warning("Prefetch of %s failed: %s", playlist.name, error)
@@ -0,0 +1,78 @@
+import sys
+from array import array
+from collections.abc import Sequence
+
+TRACK_URI_PREFIX = "spotify:track:"
+
+
+def parse_year(release_date):
+    """Year of a Spotify release date (YYYY, YYYY-MM or YYYY-MM-DD), 0 if unknown"""
+    year = (release_date or "")[:4]
+    return int(year) if year.isdigit() else 0
+
+
+class SpotifySong:
+    """What the game needs to know about a song, nothing more"""
+
+    __slots__ = ("uri", "name", "artist", "year")
+
+    def __init__(self, uri, name, artist, year):
+        self.uri = uri
+        self.name = name
+        self.artist = artist
+        self.year = year
+
+    @property
+    def details(self):
+        if self.year:
+            return f"{self.artist} - {self.name} - {self.year}"
+        return f"{self.artist} - {self.name}"
+
+
+class SongStore(Sequence):
+    """Songs of a playlist kept column by column.
+
+    Artists are interned, so a playlist holding the same artist many times
+    keeps a single string, years are packed in an array and track uris
+    lose their common prefix. SpotifySong objects are only built when a
+    song is read.
+    """
+
+    def __init__(self, rows=()):
+        self.ids = []
+        self.names = []
+        self.artists = []
+        self.years = array("H")
+        self.extend(rows)
+
+    def extend(self, rows):
+        """Append [uri, name, artist, year] rows"""
+        for uri, name, artist, year in rows:
+            if uri.startswith(TRACK_URI_PREFIX):
+                uri = uri.rpartition(":")[2]
+            self.ids.append(uri)
+            self.names.append(name)
+            self.artists.append(sys.intern(artist))
+            self.years.append(year)
+
+    def uri(self, index):
+        song_id = self.ids[index]
+        if ":" in song_id:  # local files and other non track uris
+            return song_id
+        return TRACK_URI_PREFIX + song_id
+
+    def rows(self):
+        return [
+            [self.uri(index), self.names[index], self.artists[index], self.years[index]]
+            for index in range(len(self))
+        ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return SpotifySong(
+            self.uri(index), self.names[index], self.artists[index], self.years[index]
+        )
@@ -1,33 +1,64 @@
-import spotipy
+import config
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from spotipy.oauth2 import SpotifyOAuth
+from utils import Dispatcher, InstrumentedClient, metrics
+from .auth import TokenRefresher
+from .cache import open_catalog_cache
+from .client import RateLimitedSpotify, TokenBucket
+from .devices import DeviceWatcher
+from .playback import PlaybackReconciler, PlaybackWorker
+from .prefetch import RECENTLY_PLAYED_SCOPE, PlaylistPrefetcher
+from .songs import SongStore, parse_year
 
+logger = logging.getLogger(__name__)
 
-class SpotifySong:
-    def __init__(self, playlist, uri, name, album, release_date, artist):
-        self.playlist = playlist
-        self.manager = playlist.manager
-        self.sp = playlist.sp
-        self.uri = uri
-        self.name = name
-        self.album = album
-        self.release_date = release_date
-        self.artist = artist
+# Largest page size accepted by each endpoint
+PLAYLIST_ITEMS_LIMIT = 100
+PLAYLISTS_LIMIT = 50
 
-    @property
-    def details(self):
-        return f"{self.artist} - {self.name} - {self.release_date}"
+
+def iter_pages(fetch, limit):
+    """Yield the items of every page, in order.
+
+    fetch(limit, offset) returns one page. The first page gives the total,
+    the remaining offsets are then requested concurrently.
+    """
+    first = fetch(limit, 0)
+    yield first["items"]
+
+    offsets = range(limit, first.get("total") or 0, limit)
+    if not offsets:
+        return
+    workers = min(config.PAGE_FETCH_WORKERS, len(offsets))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for page in executor.map(lambda offset: fetch(limit, offset), offsets):
+            yield page["items"]
 
 
 class SpotifyPlaylist:
-    def __init__(self, manager, name, uri):
+    def __init__(self, manager, name, uri, snapshot_id=None, total=None):
         self.manager = manager
         self.uri = uri
+        self.snapshot_id = snapshot_id
+        self.total = total
         self.sp = manager.sp
+        # Songs arrive page by page in _loaded, _songs is set once complete
         self._songs = None
+        self._loaded = SongStore()
+        self._loader = None
+        # Snapshot the loaded songs come from, snapshot_id is the latest one
+        self._songs_snapshot_id = None
+        self._songs_condition = threading.Condition()
+        # Random subset of the songs played in a quick game
+        self.sample_size = None
+        self._sample = None
+        self._sample_thread = None
         self.name = name
         self.current_index = 0
-        self.player_status = None
-        self.device_id = manager.device_id
 
     @property
     def current_song_number(self):
@@ -38,52 +69,235 @@ class SpotifyPlaylist:
         if self._songs is not None:
             return self._songs
 
-        limit = 50
-        offset = 0
-        stop = False
-        ok_songs = []
-        while not stop:
-            songs = self.sp.playlist_items(
-                self.uri, limit=limit, offset=offset, additional_types=["track"]
+        self.preload()
+        with self._songs_condition:
+            while self._songs is None:
+                self._songs_condition.wait()
+        return self._songs
+
+    def preload(self, fetch=None):
+        """Start loading the songs in the background.
+
+        fetch(limit, offset) returns a page of items, fetch_page by default.
+        """
+        with self._songs_condition:
+            if self._songs is not None or self._loader is not None:
+                return
+            self._loader = threading.Thread(
+                target=self.load_songs, args=(fetch or self.fetch_page,), daemon=True
+            )
+            self._loader.start()
+
+    def load_songs(self, fetch):
+        snapshot_id = self.snapshot_id
+        try:
+            self.fetch_songs(snapshot_id, fetch)
+        finally:
+            # Waiting readers must never hang, whatever happened
+            self.songs_loaded(snapshot_id)
+        # The playlist may have been edited while it was loading
+        self.drop_stale_songs(fetch)
+
+    def fetch_songs(self, snapshot_id, fetch):
+        cache = self.manager.catalog_cache
+        try:
+            rows = cache.load(self.uri, snapshot_id)
+        except Exception as error:  # the cache is only an optimization
+            logger.warning("Catalog cache read failed: %s", error)
+            rows = None
+        if rows is not None:
+            self.add_songs(rows)
+            return
+
+        try:
+            for items in iter_pages(fetch, PLAYLIST_ITEMS_LIMIT):
+                self.add_songs(self.parse_items(items))
+        except Exception as error:  # keep the songs received so far
+            logger.warning("Loading playlist %s failed: %s", self.name, error)
+            return
+        try:
+            cache.store(self.uri, snapshot_id, self._loaded.rows())
+        except Exception as error:
+            logger.warning("Catalog cache write failed: %s", error)
+
+    def add_songs(self, rows):
+        with self._songs_condition:
+            self._loaded.extend(rows)
+            self._songs_condition.notify_all()
+
+    def songs_loaded(self, snapshot_id):
+        with self._songs_condition:
+            self._songs = self._loaded
+            self._songs_snapshot_id = snapshot_id
+            self._songs_condition.notify_all()
+
+    def wait_for_song(self, index):
+        """Wait until the song at index is loaded, False if there is none"""
+        self.preload()
+        with self._songs_condition:
+            while index >= len(self._loaded) and self._songs is None:
+                self._songs_condition.wait()
+            return index < len(self._loaded)
+
+    def update(self, name, snapshot_id, total):
+        self.name = name
+        self.total = total
+        self.snapshot_id = snapshot_id
+        self.drop_stale_songs()
+
+    def drop_stale_songs(self, fetch=None):
+        """Forget songs loaded from an older snapshot than snapshot_id.
+
+        Songs of a running game are kept, and a load in progress is checked
+        again once it completes. With fetch, loading starts again at once.
+        """
+        if self is self.manager.active_playlist:
+            return
+        with self._songs_condition:
+            if self._songs is None or self._songs_snapshot_id == self.snapshot_id:
+                return
+            self._songs = None
+            self._loaded = SongStore()
+            self._loader = None
+        if fetch is not None:
+            self.preload(fetch)
+
+    def start_game(self, sample_size=None):
+        """Start from the first song, of a random sample when a size is given"""
+        self.current_index = 0
+        thread = None
+        if sample_size is not None:
+            thread = threading.Thread(
+                target=self.load_sample, args=(sample_size,), daemon=True
             )
-            items = songs["items"]
-            for item in items:
-                if "track" not in item:
-                    continue
-                track = item["track"]
-                uri = track["uri"]
-                name = track["name"]
-                album = track["album"]
-                release_date = album["release_date"]
-                artists = track["artists"]
-                artist = " & ".join([x["name"] for x in artists])
-                song = SpotifySong(
-                    self,
-                    uri,
-                    name,
-                    album,
-                    release_date,
-                    artist,
-                )
-                ok_songs.append(song)
-            if len(items) == limit:
-                offset += limit
-            else:
-                stop = True
-        self._songs = ok_songs
-        return ok_songs
+        # Readers see sample mode only once its loader is set
+        with self._songs_condition:
+            self._sample = None
+            self._sample_thread = thread
+            self.sample_size = sample_size
+        if thread is None:
+            self.preload()
+        else:
+            thread.start()
+
+    def load_sample(self, sample_size):
+        rng = random.Random()
+        sample = None
+        try:
+            if self._songs is None:
+                try:
+                    sample = self.fetch_sample(rng, sample_size)
+                except Exception as error:  # sample from the whole playlist instead
+                    logger.warning("Sampling playlist %s failed: %s", self.name, error)
+            if sample is None:
+                songs = self.songs
+                sample = rng.sample(songs, min(sample_size, len(songs)))
+        finally:
+            with self._songs_condition:
+                # A new game may have started meanwhile
+                if self._sample_thread is threading.current_thread():
+                    # Play nothing rather than crash if sampling itself failed
+                    self._sample = sample if sample is not None else SongStore()
+                    self._songs_condition.notify_all()
+
+    def wait_for_sample(self, timeout=None):
+        """The sample of the current game, None if still loading after timeout"""
+        with self._songs_condition:
+            self._songs_condition.wait_for(lambda: self._sample is not None, timeout)
+            return self._sample
+
+    def fetch_sample(self, rng, sample_size):
+        """Fetch only the pages holding sample_size random songs"""
+        total = self.total
+        if total is None:
+            total = self.fetch_page(1, 0)["total"]
+        offsets = rng.sample(range(total), min(sample_size, total))
+        # Only fetch, in each page, the span holding the chosen offsets
+        spans = {}
+        for offset in offsets:
+            page = offset // PLAYLIST_ITEMS_LIMIT
+            first, last = spans.get(page, (offset, offset))
+            spans[page] = (min(first, offset), max(last, offset))
+
+        def fetch_span(span):
+            first, last = span
+            return first, self.fetch_page(last - first + 1, first)["items"]
+
+        items = {}
+        workers = min(config.PAGE_FETCH_WORKERS, len(spans)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for first, span_items in executor.map(fetch_span, spans.values()):
+                for index, item in enumerate(span_items):
+                    items[first + index] = item
+        picked = [items[offset] for offset in offsets if offset in items]
+        return SongStore(self.parse_items(picked))
+
+    @property
+    def sequence(self):
+        """Songs played in the current game"""
+        if self.sample_size is None:
+            return self.songs
+        sample = self.wait_for_sample(config.QUICK_GAME_SAMPLE_TIMEOUT)
+        if sample is None:
+            logger.warning("Sample of playlist %s is not ready", self.name)
+            return SongStore()
+        return sample
+
+    def song_at(self, index):
+        if self.sample_size is not None:
+            return self.sequence[index]
+        if not self.wait_for_song(index):
+            raise IndexError(f"No song {index} in playlist {self.name}")
+        return self._loaded[index]
+
+    def fetch_page(self, limit, offset):
+        return self.sp.playlist_items(
+            self.uri, limit=limit, offset=offset, additional_types=["track"]
+        )
+
+    @staticmethod
+    def parse_items(items):
+        rows = []
+        for item in items:
+            track = item.get("track")
+            if not track:
+                continue
+            artist = " & ".join([x["name"] for x in track["artists"]])
+            year = parse_year(track["album"].get("release_date"))
+            rows.append([track["uri"], track["name"], artist, year])
+        return rows
 
     @property
     def number_of_songs(self):
+        if self.sample_size is not None:
+            if self._sample is not None:
+                return len(self._sample)
+            return min(self.sample_size, self.number_of_songs_in_playlist)
+        return self.number_of_songs_in_playlist
+
+    @property
+    def number_of_songs_in_playlist(self):
+        if self._songs is not None:
+            return len(self._songs)
+        if self.total is not None:
+            return self.total
         return len(self.songs)
 
     @property
     def current_song(self):
-        return self.songs[self.current_index]
+        return self.song_at(self.current_index)
 
     @property
     def is_over(self):
         next_index = self.current_index + 1
+        if self.sample_size is not None:
+            if self._sample is None:
+                # Never wait for the sample on the Tk thread
+                return next_index >= self.number_of_songs
+            return next_index >= len(self._sample)
+        if self._songs is None:
+            # Still loading, the advertised total may count unplayable items
+            return not self.wait_for_song(next_index)
         if next_index >= self.number_of_songs:
             return True
         else:
@@ -92,20 +306,22 @@ class SpotifyPlaylist:
     def next_song(self):
         self.current_index += 1
 
-    def play(self):
-        uri = self.current_song.uri
-        self.player_status = "play"
-        self.sp.start_playback(device_id=self.device_id, uris=[uri])
+    def song_uri(self, index):
+        return lambda: self.song_at(index).uri
+
+    def prepare(self):
+        """Resolve the current song and wake the device before playing it"""
+        return self.manager.playback.prepare(self.song_uri(self.current_index))
+
+    def play(self, callback=None):
+        return self.manager.playback.play(self.song_uri(self.current_index), callback)
 
+    # The playback worker skips these when Spotify is already in that state
     def pause(self):
-        if self.player_status != "pause":
-            self.sp.pause_playback(device_id=self.device_id)
-            self.player_status = "pause"
+        return self.manager.playback.pause()
 
     def resume(self):
-        if self.player_status != "play":
-            self.sp.start_playback(device_id=self.device_id)
-            self.player_status = "play"
+        return self.manager.playback.resume()
 
 
 class SpotifyManager:
@@ -118,89 +334,180 @@ class SpotifyManager:
             "playlist-read-private",
             "playlist-read-collaborative",
         ]
+        if config.PREFETCH_RECENTLY_PLAYED:
+            scopes.append(RECENTLY_PLAYED_SCOPE)
         scope = ",".join(scopes)
         self.auth_manager = SpotifyOAuth(scope=scope)
+        # Token refreshes happen inside API calls, time them on their own
+        self.auth_manager.refresh_access_token = metrics.wrap(
+            "spotify.token_refresh",
+            self.auth_manager.refresh_access_token,
+            config.SLOW_SPOTIFY_CALL,
+        )
+        self.token_refresher = TokenRefresher(
+            self.auth_manager, config.TOKEN_REFRESH_MARGIN
+        )
         self._sp = None
         self._user = None
         self._devices = None
         self.chosen_device = None
         self._playlists = None
+        self._playlists_fetched_at = None
+        self._playlists_lock = threading.Lock()
+        self._playlists_refresh_thread = None
+        self.catalog_cache = open_catalog_cache(config.CATALOG_CACHE_PATH)
         self.active_playlist = None
         self.player_status = None
+        self.dispatcher = Dispatcher()
+        self.device_watcher = DeviceWatcher(
+            self, config.DEVICE_POLL_MIN, config.DEVICE_POLL_MAX
+        )
+        self.playback = PlaybackWorker(self)
+        self.playback_state = PlaybackReconciler(
+            self,
+            config.PLAYBACK_POLL_ACTIVE,
+            config.PLAYBACK_POLL_IDLE,
+            config.PLAYBACK_STATE_MAX_AGE,
+            config.PLAYBACK_COMMAND_GRACE,
+        )
+        self.prefetcher = PlaylistPrefetcher(
+            self, config.PREFETCH_WORKERS, config.RECENTLY_PLAYED_LIMIT
+        )
 
     @property
     def sp(self):
         if self._sp is not None:
             return self._sp
         else:
-            self._sp = spotipy.Spotify(auth_manager=self.auth_manager)
+            client = RateLimitedSpotify(
+                TokenBucket(
+                    config.API_RATE, config.API_BURST, config.API_THROTTLE_COOLDOWN
+                ),
+                pool_size=config.PAGE_FETCH_WORKERS + 2,
+                auth_manager=self.token_refresher,
+            )
+            self._sp = InstrumentedClient(
+                client, metrics, "spotify", config.SLOW_SPOTIFY_CALL
+            )
             return self._sp
 
     def get_device_list(self):
-        devices = self.sp.devices()
-        self._devices = devices["devices"]
-        for device in self._devices:
-            if device["is_active"]:
-                self.chosen_device = device
-        if self.chosen_device is None:
-            if len(self._devices):
-                self.chosen_device = self._devices[0]
+        self.update_devices(self.sp.devices()["devices"])
+        self.device_watcher.start()
         return self._devices
 
+    def update_devices(self, devices):
+        self._devices = devices
+        chosen_id = self.device_id
+        if chosen_id is None:
+            self.chosen_device = self.default_device(devices)
+            return
+        for device in devices:
+            if device["id"] == chosen_id:
+                self.chosen_device = device
+                return
+        logger.warning("Device %s is gone", self.chosen_device["name"])
+        self.chosen_device = self.fallback_device(devices)
+
+    def default_device(self, devices):
+        for device in devices:
+            if device["is_active"]:
+                return device
+        if len(devices):
+            return devices[0]
+        return None
+
+    def fallback_device(self, devices):
+        for device in devices:
+            if device["name"] == config.FALLBACK_DEVICE_NAME:
+                return device
+        return self.default_device(devices)
+
     def set_device(self, device):
         self.chosen_device = device
 
     @property
     def playlists(self):
-        if self._playlists is not None:
-            self._playlists
-
-        limit = 50
-        offset = 0
-        stop = False
-        ok_playlists = []
-        while not stop:
-            playlists = self.sp.current_user_playlists(limit, offset)
-            items = playlists["items"]
-            for item in items:
-                name = item["name"]
-                if name.lower().startswith("mbt_"):
-                    uri = item["uri"]
-                    ok_name = name[4:]
-                    ok_playlists.append(SpotifyPlaylist(self, ok_name, uri))
-
-            if len(items) == limit:
-                offset += limit
-            else:
-                stop = True
-        self._playlists = ok_playlists
+        if self._playlists is None:
+            return self.refresh()
+        age = time.monotonic() - self._playlists_fetched_at
+        if age > config.PLAYLISTS_TTL:
+            self.refresh_in_background()
+        return self._playlists
+
+    def refresh(self):
+        """Fetch the playlist listing, keeping already known playlists"""
+        with self._playlists_lock:
+            known = {playlist.uri: playlist for playlist in self._playlists or []}
+            ok_playlists = []
+            for items in iter_pages(self.sp.current_user_playlists, PLAYLISTS_LIMIT):
+                for item in items:
+                    name = item["name"]
+                    if name.lower().startswith("mbt_"):
+                        uri = item["uri"]
+                        ok_name = name[4:]
+                        snapshot_id = item.get("snapshot_id")
+                        total = (item.get("tracks") or {}).get("total")
+                        playlist = known.get(uri)
+                        if playlist is None:
+                            playlist = SpotifyPlaylist(
+                                self, ok_name, uri, snapshot_id, total
+                            )
+                        else:
+                            playlist.update(ok_name, snapshot_id, total)
+                        ok_playlists.append(playlist)
+            self._playlists = ok_playlists
+            self._playlists_fetched_at = time.monotonic()
         return ok_playlists
 
+    def refresh_in_background(self):
+        thread = self._playlists_refresh_thread
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=self.refresh, daemon=True)
+        self._playlists_refresh_thread = thread
+        thread.start()
+
     @property
     def devices(self):
         if self._devices is not None:
             return self._devices
+        return self.get_device_list()
 
-        devices = self.sp.devices()
-        self._devices = devices["devices"]
-        for device in self._devices:
-            if device["is_active"]:
-                self.chosen_device = device
-        if self.chosen_device is None:
-            if len(self._devices):
-                self.chosen_device = self._devices[0]
-        return self._devices
+    def client_stats(self):
+        return self.sp.client_stats
+
+    def catalog_cache_stats(self):
+        return self.catalog_cache.stats
+
+    def invalidate_catalog_cache(self, uri=None):
+        return self.catalog_cache.invalidate(uri)
 
     def check_login_status(self):
-        token_info = self.auth_manager.get_cached_token()
+        return self.token_refresher.is_logged_in
+
+    def login(self):
+        self.token_refresher.get_access_token()
+
+    def has_scope(self, scope):
+        """Whether the cached token grants scope"""
+        token_info = self.token_refresher.load()
+        return token_info is not None and scope in token_info.get("scope", "").split()
+
+    def set_round_active(self, active):
+        self.playback_state.set_round_active(active)
+        if active:
+            self.prefetcher.pause()
+        else:
+            self.prefetcher.resume()
 
-        if token_info:
-            if not self.auth_manager.is_token_expired(token_info):
-                return True
-        return False
+    def start_prefetch(self):
+        """Load every game playlist in the background, once logged in"""
+        if self.check_login_status():
+            self.prefetcher.start()
 
-    def set_playlist(self, index):
-        self.active_playlist = self.playlists[index]
+    def set_playlist(self, playlist):
+        self.active_playlist = playlist
 
     @property
     def device_id(self):
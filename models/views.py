@@ -1,7 +1,12 @@
+import config
+import logging
+import time
 from tkinter import Frame, Button
-from .helpers import CountDown, Chronometer
-from utils import play_sound
-from time import sleep
+from .game import GameEngine
+from .helpers import BuzzerArbiter, CountDown, Chronometer, PrefixIndex
+from utils import metrics, play_sound
+
+logger = logging.getLogger(__name__)
 
 
 class NavigationButton(Button):
@@ -17,9 +22,20 @@ class Page(Frame):
         self.controller = controller
         self.root = controller.root
         self.spotify_manager = controller.spotify_manager
+        # Cancelled when the page is hidden
+        self.timers = controller.scheduler.group(self)
 
         self.navigation_buttons = []
         self.elements = []
+        # Widgets created by setup, reused in order by the next setup
+        self.widget_pool = []
+        self._widget_index = 0
+        # (sequence, funcid) bound on each pooled widget
+        self._bindings = {}
+        # Grid options currently applied to each element
+        self._placed = {}
+        self._layout_cache = {}
+        self._visible = False
 
         self.selected_button_index = None
         self._setup = False
@@ -49,6 +65,53 @@ class Page(Frame):
     def add_navigation_button(self, button):
         self.navigation_buttons.append(button)
 
+    def create_button(self, **options):
+        """Return a Button, reusing the one the previous setup made at this position"""
+        index = self._widget_index
+        self._widget_index += 1
+        if index < len(self.widget_pool):
+            button, keys = self.widget_pool[index]
+            if keys == set(options):
+                self.unbind_button(button)
+                button.configure(**options)
+                return button
+            self.destroy_widget(button)
+        button = Button(self.root, **options)
+        if index < len(self.widget_pool):
+            self.widget_pool[index] = (button, set(options))
+        else:
+            self.widget_pool.append((button, set(options)))
+        return button
+
+    def bind_button(self, button, sequence, callback):
+        """Bind like button.bind, keeping the funcid to unbind it on reuse"""
+        funcid = button.bind(sequence, callback)
+        self._bindings.setdefault(button, []).append((sequence, funcid))
+        return funcid
+
+    def unbind_button(self, button):
+        # Tkinter only deletes the Tcl command of a callback given its funcid
+        for sequence, funcid in self._bindings.pop(button, []):
+            button.unbind(sequence, funcid)
+
+    def trim_widget_pool(self):
+        """Destroy the pooled widgets the last setup did not use"""
+        used = self._widget_index
+        for button, keys in self.widget_pool[used:]:
+            self.destroy_widget(button)
+        del self.widget_pool[used:]
+
+    def destroy_widget(self, widget):
+        self._placed.pop(widget, None)
+        self._bindings.pop(widget, None)
+        widget.destroy()
+
+    def destroy(self):
+        for button, keys in self.widget_pool:
+            self.destroy_widget(button)
+        self.widget_pool = []
+        Frame.destroy(self)
+
     def reset_setup(self):
         self._setup = False
         self.navigation_buttons = []
@@ -56,38 +119,68 @@ class Page(Frame):
 
     def show(self):
         if not self._setup:
+            self._widget_index = 0
             self.setup()
+            self.trim_widget_pool()
             self._setup = True
 
-        grid_columns, grid_rows = self.root.grid_size()
-        rowspan = int(grid_rows / self.rows)
+        wanted = {}
+        for row_elements, row_layout in zip(self.elements, self.layout()):
+            for element, options in zip(row_elements, row_layout):
+                wanted[element] = options
 
-        for row in range(self.rows):
-            ok_row = row * rowspan
-            row_elements = self.elements[row]
-            columnspan = int(grid_columns / len(row_elements))
-            for column in range(self.columns):
-                if column >= len(row_elements):
-                    continue
-                ok_column = column * columnspan
-                element = row_elements[column]
-                element.grid(
-                    column=ok_column,
-                    row=ok_row,
-                    columnspan=columnspan,
-                    rowspan=rowspan,
-                    **self.grid_dict,
-                )
+        for element in list(self._placed):
+            if element not in wanted:
+                element.grid_forget()
+                del self._placed[element]
+        for element, options in wanted.items():
+            if self._placed.get(element) != options:
+                element.grid(**options)
+                self._placed[element] = options
+            elif not self._visible:
+                # grid_remove kept the options, grid() alone maps it back
+                element.grid()
+        self._visible = True
 
         self.tkraise()
         if len(self.navigation_buttons):
             self.navigation_buttons[0].focus_set()
             self.selected_button_index = 0
 
+    def layout(self):
+        """Grid options of every element, by row, cached per grid shape"""
+        grid_columns, grid_rows = self.root.grid_size()
+        shape = tuple(len(row_elements) for row_elements in self.elements)
+        key = (grid_columns, grid_rows, shape)
+        if key in self._layout_cache:
+            return self._layout_cache[key]
+
+        layout = []
+        rowspan = int(grid_rows / self.rows)
+        for row, columns in enumerate(shape):
+            columnspan = int(grid_columns / columns)
+            row_layout = []
+            for column in range(columns):
+                row_layout.append(
+                    dict(
+                        column=column * columnspan,
+                        row=row * rowspan,
+                        columnspan=columnspan,
+                        rowspan=rowspan,
+                        **self.grid_dict,
+                    )
+                )
+            layout.append(row_layout)
+        self._layout_cache[key] = layout
+        return layout
+
     def hide(self):
-        for row in self.elements:
-            for element in row:
-                element.grid_forget()
+        self.timers.cancel_all()
+        if not self._visible:
+            return
+        for element in self._placed:
+            element.grid_remove()
+        self._visible = False
 
     def navigate_up(self):
         self.selected_button_index = (self.selected_button_index - 1) % len(
@@ -107,23 +200,35 @@ class Page(Frame):
     def key_pressed(self, event):
         pass
 
+    def devices_changed(self, devices):
+        pass
+
+    def prefetch_progress(self, progress):
+        pass
+
 
 class GamePage(Page):
     def setup(self):
         self.active_playlist = self.spotify_manager.active_playlist
         self.player_buttons = []
         self.score_buttons = []
-        self.player_colors = []
-        self.game_status = "waiting"
+        self.penalty = None
+        self.pending_buzzes = []
 
         current_song = self.active_playlist.current_song_number
         total_songs = self.active_playlist.number_of_songs
         button_text = f"Song {current_song}/{total_songs}"
-        button = Button(self.root, text=button_text, **self.button_dict)
+        button = self.create_button(text=button_text, **self.button_dict)
         self.add_row([button])
 
-        button = Button(self.root, text="Time", **self.button_dict)
-        self.chronometer = Chronometer(button)
+        button = self.create_button(text="Time", **self.button_dict)
+        self.chronometer = Chronometer(button, self.timers)
+        self.engine = GameEngine(
+            self.controller.players,
+            self.controller.scores,
+            self.active_playlist,
+            timer=self.chronometer,
+        )
         self.answer_button = button
         self.add_row([button])
 
@@ -135,117 +240,127 @@ class GamePage(Page):
             "font": ("Arial", 25, "bold"),
         }
         self.player_grid_dict = {"sticky": "nswe", "padx": 10, "pady": 10}
+        self.arbiter = BuzzerArbiter(
+            self.timers, self.buzz_winner, config.BUZZER_ARBITRATION_MS
+        )
         row = []
         for player in range(self.controller.players):
-            button = Button(self.root, text=f"P{player+1}", **self.player_button_dict)
+            button = self.create_button(text=f"P{player+1}", **self.player_button_dict)
             row.append(button)
             self.player_buttons.append(button)
-            self.player_colors.append("black")
         self.add_row(row)
 
         row = []
         for player in range(self.controller.players):
             score = self.controller.scores[player]
-            button = Button(self.root, text=f"{score}", **self.button_dict)
+            button = self.create_button(text=f"{score}", **self.button_dict)
             self.score_buttons.append(button)
             row.append(button)
         self.add_row(row)
 
-        button = Button(self.root, text="Quit", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("StartPage"))
+        button = self.create_button(text="Quit", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("StartPage")
+        )
         self.add_navigation_button(button)
         self.add_row([button])
 
     def show(self):
         Page.show(self)
-        self.game_status = "playing"
-        self.active_playlist.play()
-        self.chronometer.start()
+        self.spotify_manager.set_round_active(True)
+        self.arbiter.start_round()
+        self.engine.start_round(callback=self.playback_started)
 
-    def pause(self):
-        self.game_status = "pause"
-        self.chronometer.pause()
-        self.active_playlist.pause()
+    def hide(self):
+        Page.hide(self)
+        self.spotify_manager.set_round_active(False)
+        self.record_reaction_times()
+        if self.penalty is not None:
+            self.controller.tasks.cancel(self.penalty)
+            self.penalty = None
+
+    def record_reaction_times(self):
+        """Send the round reaction times, from audio start, to the metrics"""
+        for player, seconds in self.arbiter.reaction_times.items():
+            if seconds < 0:  # pressed before the song could be heard
+                continue
+            metrics.record("game.reaction_time", seconds)
+            metrics.record(f"game.reaction_time.p{player + 1}", seconds)
+        self.arbiter.reaction_times = {}
+
+    def playback_started(self, command):
+        if command.error is not None or command.done_at is None:
+            return
+        self.arbiter.playback_started_at = command.done_at
+        countdown_ended_at = self.controller.frames["SplashPage"].countdown_ended_at
+        if countdown_ended_at is None:
+            return
+        duration = command.done_at - countdown_ended_at
+        metrics.record("game.countdown_to_audio", duration)
+        logger.info("Countdown end to audio: %.0f ms", duration * 1000)
 
     def wrong_answer(self):
-        if self.game_status != "pause":
+        if self.engine.status != "pause" or self.penalty is not None:
             return
-        play_sound("./sounds/ko.mp3", True)
-        sleep(1)
-        self.add_wrong_answer_score()
-        self.reset_player_buttons()
-        self.active_playlist.resume()
-        self.chronometer.resume()
-        self.game_status = "playing"
+        self.penalty = self.controller.tasks.spawn(self.wrong_answer_steps())
+
+    def wrong_answer_steps(self):
+        """Let the wrong answer sound play, then resume the song.
+
+        Buzzes pressed until the song plays again are kept and handed to
+        the arbiter then, in press order. Answer keys are ignored meanwhile.
+        """
+        play_sound("./sounds/ko.mp3")
+        yield config.WRONG_ANSWER_PENALTY
+        self.engine.wrong_answer()
+        self.update_scores()
+        self.update_player_buttons()
+        command = self.engine.last_command
+        if command is not None:
+            yield command.future
+        self.penalty = None
+        pending_buzzes, self.pending_buzzes = self.pending_buzzes, []
+        for player, event in pending_buzzes:
+            self.answer_from_player(player, event)
 
     def display_answer(self):
-        button_text = self.active_playlist.current_song.details
+        try:
+            button_text = self.active_playlist.current_song.details
+        except IndexError:  # empty playlist or sample
+            button_text = "No song available"
         self.answer_button.configure(text=button_text)
 
-    def add_right_answer_score(self, complete=False):
-        add_score = 10
-        if self.chronometer.bonus:
-            play_sound("./sounds/ok.mp3", True)
-            add_score += self.chronometer.bonus
-        if complete:
-            play_sound("./sounds/ok.mp3", True)
-            add_score += 5
-        else:
-            play_sound("./sounds/ok.mp3", True)
-        self.update_scores(add_score)
-
-    def add_wrong_answer_score(self):
-        add_score = -5
-        self.update_scores(add_score)
-
-    def update_scores(self, to_add):
-        for index, color in enumerate(self.player_colors):
-            if color == "green":
-                current_score = self.controller.scores[index]
-                self.controller.scores[index] = max(0, current_score + to_add)
+    def update_scores(self):
         for player in range(self.controller.players):
             score = self.controller.scores[player]
             self.score_buttons[player].configure(text=f"{score}")
 
     def go_next(self):
-        if self.game_status not in ["score", "skip"]:
+        if not self.engine.can_go_next:
             return
 
         def next_action():
-            if self.active_playlist.is_over:
+            if not self.engine.next_round():
                 self.controller.frames["ScorePage"].reset_setup()
                 self.controller.show_frame("ScorePage")
-                self.controller.frames["SplashPage"].reset()
             else:
-                self.active_playlist.next_song()
                 self.controller.show_frame("SplashPage")
-                self.controller.frames["SplashPage"].reset()
 
-        self.after(1000, next_action)
+        self.timers.schedule("next", 1, next_action)
 
-    def right_answer(self):
-        if self.game_status != "pause":
+    def right_answer(self, complete=False):
+        if self.penalty is not None or not self.engine.right_answer(complete):
             return
-        self.game_status = "score"
-        self.active_playlist.resume()
         self.display_answer()
-        self.add_right_answer_score()
+        self.update_scores()
         play_sound("./sounds/ok.mp3", True)
 
     def complete_answer(self):
-        if self.game_status != "pause":
-            return
-        self.game_status = "score"
-        self.active_playlist.resume()
-        self.display_answer()
-        self.add_right_answer_score(complete=True)
+        self.right_answer(complete=True)
 
     def skip(self):
-        if self.game_status != "playing":
-            return
-        self.game_status = "skip"
-        self.chronometer.pause()
-        self.display_answer()
+        if self.penalty is None and self.engine.skip():
+            self.display_answer()
 
     def key_pressed(self, event):
         key = event.char.lower()
@@ -257,7 +372,7 @@ class GamePage(Page):
         }
         if key in mapping:
             player = mapping[key]
-            self.answer_from_player(player)
+            self.answer_from_player(player, event)
         elif key == "t":
             self.wrong_answer()
 
@@ -273,21 +388,24 @@ class GamePage(Page):
         elif key == "g":
             self.go_next()
 
-    def answer_from_player(self, player):
-        if self.game_status == "playing":
-            if self.player_colors[player] != "red":
-                self.player_colors[player] = "green"
-                self.update_player_buttons()
-                self.pause()
-
-    def reset_player_buttons(self):
-        for player in range(self.controller.players):
-            self.player_colors[player] = "black"
-        self.update_player_buttons()
+    def answer_from_player(self, player, event):
+        if player >= self.controller.players:
+            return
+        if self.penalty is not None:
+            self.pending_buzzes.append((player, event))
+        elif self.engine.status == "playing":
+            if self.engine.player_colors[player] != "red":
+                self.arbiter.buzz(player, event)
+        elif self.engine.status == "pause":
+            self.arbiter.record(player, event)
+
+    def buzz_winner(self, player, pressed_at):
+        if self.engine.buzz(player, pressed_at):
+            self.update_player_buttons()
 
     def update_player_buttons(self):
         for player in range(self.controller.players):
-            color = self.player_colors[player]
+            color = self.engine.player_colors[player]
             self.player_buttons[player].configure(highlightbackground=color)
 
 
@@ -300,77 +418,105 @@ class SplashPage(Page):
         }
 
     def setup(self):
-        button = Button(self.root, text="", **self.button_dict)
+        button = self.create_button(text="", **self.button_dict)
         self.add_row([button])
+        self.countdown_ended_at = None
 
         def action_1():
+            self.countdown_ended_at = time.perf_counter()
             self.controller.show_frame("GamePage")
 
         actions = [action_1]
-        self.countdown = CountDown(button, actions, 6)
-        self.countdown.start()
+        self.countdown = CountDown(button, actions, 6, self.timers)
+
+    def show(self):
+        Page.show(self)
+        self.start_countdown()
 
-    def reset(self):
+    def start_countdown(self):
+        # Get the next song ready while the countdown runs
+        self.spotify_manager.active_playlist.prepare()
         self.countdown.reset()
         self.countdown.start()
 
 
 class ScorePage(Page):
     def setup(self):
-        button = Button(self.root, text="Final Result !", **self.button_dict)
+        button = self.create_button(text="Final Result !", **self.button_dict)
         self.add_row([button])
 
         for player in range(self.controller.players):
             score = self.controller.scores[player]
             button_text = f"Player {player+1} - Score {score}"
-            button = Button(self.root, text=button_text, **self.button_dict)
+            button = self.create_button(text=button_text, **self.button_dict)
             self.add_row([button])
 
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("StartPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("StartPage")
+        )
         self.add_row([button])
         self.add_navigation_button(button)
 
 
 class StartPage(Page):
     def setup(self):
-        button = Button(self.root, text="Start Game", **self.button_dict)
-        button.bind(
-            "<Return>", lambda event: self.controller.show_frame("PlaylistChoicePage")
+        button = self.create_button(text="Start Game", **self.button_dict)
+        self.bind_button(
+            button,
+            "<Return>",
+            lambda event: self.controller.show_frame("PlaylistChoicePage"),
         )
+        self.start_button = button
+        self.display_prefetch(self.spotify_manager.prefetcher.progress)
         self.add_row([button])
         self.add_navigation_button(button)
 
-        button = Button(self.root, text="Settings", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("SettingPage"))
+        button = self.create_button(text="Settings", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("SettingPage")
+        )
         self.add_row([button])
         self.add_navigation_button(button)
 
         # Last row
-        button = Button(self.root, text="Quit", **self.button_dict)
-        button.bind("<Return>", lambda event: self.root.destroy())
+        button = self.create_button(text="Quit", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.root.destroy())
         self.add_row([button])
         self.add_navigation_button(button)
 
+    def prefetch_progress(self, progress):
+        if self._setup:
+            self.display_prefetch(progress)
+
+    def display_prefetch(self, progress):
+        if progress is None or progress.finished:
+            button_text = "Start Game"
+        else:
+            button_text = f"Start Game ({progress.text})"
+        self.start_button.config(text=button_text)
+
 
 class ReadyPage(Page):
     def setup(self):
         self.ready = {"master": False}
         self.player_buttons = []
 
-        button = Button(self.root, text="Ready ?", **self.button_dict)
+        button = self.create_button(text="Ready ?", **self.button_dict)
         self.add_row([button])
 
         for player in range(self.controller.players):
             self.ready[player] = False
 
             button_text = f"Player {player+1} - Waiting Validation"
-            button = Button(self.root, text=button_text, **self.button_dict)
+            button = self.create_button(text=button_text, **self.button_dict)
             self.add_row([button])
             self.player_buttons.append(button)
 
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("StartPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("StartPage")
+        )
         self.add_row([button])
         self.add_navigation_button(button)
 
@@ -408,74 +554,205 @@ class ReadyPage(Page):
 
 
 class PlaylistChoicePage(Page):
+    """Playlist menu showing a window of PLAYLIST_MENU_ROWS rows.
+
+    The row buttons are built once and show the playlists around the
+    cursor, typing a name filters the list through a PrefixIndex.
+    """
+
     def setup(self):
-        button = Button(self.root, text="Choose a playlist", **self.button_dict)
+        button = self.create_button(text="Choose a playlist", **self.button_dict)
+        self.header_button = button
         self.add_row([button])
 
-        index = 1
-        for index_playlist, playlist in enumerate(self.spotify_manager.playlists):
-            index += 1
-
-            button_text = f"{playlist.name} - {playlist.number_of_songs} songs"
-            button = Button(self.root, text=button_text, **self.button_dict)
-            button.bind(
-                "<Return>",
-                lambda event, index_playlist=index_playlist: self.launch_ready_page(
-                    index_playlist
-                ),
+        self.playlists = self.spotify_manager.playlists
+        self.index = PrefixIndex(self.playlists, lambda playlist: playlist.name)
+        self.row_buttons = []
+        for row in range(min(config.PLAYLIST_MENU_ROWS, len(self.playlists))):
+            button = self.create_button(text="", **self.button_dict)
+            self.bind_button(
+                button, "<Return>", lambda event, row=row: self.launch_row(row)
             )
+            self.row_buttons.append(button)
             self.add_navigation_button(button)
             self.add_row([button])
 
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("StartPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("StartPage")
+        )
+        self.back_button = button
         self.add_navigation_button(button)
         self.add_row([button])
 
-    def launch_ready_page(self, index):
-        self.spotify_manager.set_playlist(index)
+    def show(self):
+        if self._setup and self.spotify_manager.playlists is not self.playlists:
+            self.reset_setup()
+        Page.show(self)
+        self.filter_playlists("")
+
+    def filter_playlists(self, query):
+        """Show the playlists whose name starts with query, all when empty"""
+        self.query = query
+        if query:
+            self.matches = self.index.items
+            self.positions = self.index.search(query)
+        else:
+            self.matches = self.playlists
+            self.positions = range(len(self.playlists))
+        self.top = 0
+        self.move_cursor(0)
+
+    @property
+    def number_of_matches(self):
+        return len(self.positions)
+
+    def playlist_at(self, position):
+        return self.matches[self.positions[position]]
+
+    def navigate_up(self):
+        self.move_cursor(self.cursor - 1)
+
+    def navigate_down(self):
+        self.move_cursor(self.cursor + 1)
+
+    def move_cursor(self, cursor):
+        """Select a match, or the Back button after the last one"""
+        self.cursor = cursor % (self.number_of_matches + 1)
+        if self.cursor < self.number_of_matches:
+            if self.cursor < self.top:
+                self.top = self.cursor
+            elif self.cursor >= self.top + len(self.row_buttons):
+                self.top = self.cursor - len(self.row_buttons) + 1
+        self.render()
+
+    def render(self):
+        if self.query:
+            header = f"Search: {self.query} ({self.number_of_matches})"
+        else:
+            header = "Choose a playlist"
+        self.header_button.configure(text=header)
+        for row, button in enumerate(self.row_buttons):
+            position = self.top + row
+            if position < self.number_of_matches:
+                playlist = self.playlist_at(position)
+                songs = playlist.number_of_songs_in_playlist
+                button.configure(text=f"{playlist.name} - {songs} songs")
+            else:
+                button.configure(text="")
+
+        if self.cursor < self.number_of_matches:
+            self.row_buttons[self.cursor - self.top].focus_set()
+            self.playlist_at(self.cursor).preload()
+        else:
+            self.back_button.focus_set()
+
+    def key_pressed(self, event):
+        if event.keysym == "BackSpace":
+            self.filter_playlists(self.query[:-1])
+        elif event.keysym == "Escape":
+            self.filter_playlists("")
+        elif len(event.char) == 1 and event.char.isprintable():
+            self.filter_playlists(self.query + event.char)
+
+    def launch_row(self, row):
+        position = self.top + row
+        if position < self.number_of_matches:
+            self.launch_ready_page(self.playlist_at(position))
+
+    def launch_ready_page(self, playlist):
+        self.spotify_manager.set_playlist(playlist)
+        playlist.start_game(self.controller.quick_game_songs)
         self.controller.show_frame("ReadyPage")
 
 
 class SettingPage(Page):
     def setup(self):
-        button = Button(self.root, text="Players", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("PlayerPage"))
+        button = self.create_button(text="Players", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("PlayerPage")
+        )
+        self.add_row([button])
+        self.add_navigation_button(button)
+
+        button = self.create_button(text="", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.toggle_quick_game())
+        self.quick_game_button = button
+        self.display_quick_game()
         self.add_row([button])
         self.add_navigation_button(button)
 
         # Second row
-        button = Button(self.root, text="Log in to Spotify", **self.button_dict)
-        button.bind("<Return>", lambda event: self.login_to_spotify())
+        button = self.create_button(text="Log in to Spotify", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.login_to_spotify())
         self.spotify_button = button
+        self.user_name = None
         self.add_row([button])
         self.add_navigation_button(button)
 
         # Third row
-        button = Button(self.root, text="Please choose device", **self.button_dict)
-        button.bind("<Return>", lambda event: self.update_device_list())
+        button = self.create_button(text="Please choose device", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.update_device_list())
         self.device_button = button
         self.add_row([button])
         self.add_navigation_button(button)
 
         # Last row
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("StartPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("StartPage")
+        )
         self.add_row([button])
         self.add_navigation_button(button)
 
     def login_to_spotify(self):
         if self.spotify_manager.check_login_status():
             user = self.spotify_manager.user
-            name = user["id"]
-            self.spotify_button.config(text=f"Logged in as - {name}")
+            self.user_name = user["id"]
+            self.display_login()
         else:
             self.spotify_manager.login()
         self.spotify_manager.devices
+        self.display_device()
+        self.spotify_manager.start_prefetch()
+
+    def display_login(self):
+        progress = self.spotify_manager.prefetcher.progress
+        button_text = f"Logged in as - {self.user_name}"
+        if progress is not None:
+            button_text += f" ({progress.text})"
+        self.spotify_button.config(text=button_text)
+
+    def prefetch_progress(self, progress):
+        if self._setup and self.user_name is not None:
+            self.display_login()
+
+    def display_device(self):
         if self.spotify_manager.chosen_device:
             device_name = self.spotify_manager.chosen_device["name"]
             button3_text = f"Device : {device_name}"
-            self.device_button.config(text=button3_text)
+        else:
+            button3_text = "Please choose device"
+        self.device_button.config(text=button3_text)
+
+    def devices_changed(self, devices):
+        if self._setup:
+            self.display_device()
+
+    def toggle_quick_game(self):
+        if self.controller.quick_game_songs is None:
+            self.controller.quick_game_songs = config.QUICK_GAME_SONGS
+        else:
+            self.controller.quick_game_songs = None
+        self.display_quick_game()
+
+    def display_quick_game(self):
+        songs = self.controller.quick_game_songs
+        if songs is None:
+            button_text = "Quick game : Off"
+        else:
+            button_text = f"Quick game : {songs} random songs"
+        self.quick_game_button.config(text=button_text)
 
     def update_device_list(self):
         self.spotify_manager.devices
@@ -485,23 +762,25 @@ class SettingPage(Page):
 class PlayerPage(Page):
     def setup(self):
         button_text = f"Current Player : {self.controller.players}"
-        button = Button(self.root, text=button_text, **self.button_dict)
+        button = self.create_button(text=button_text, **self.button_dict)
         self.player_button = button
         self.add_row([button])
 
-        button = Button(self.root, text="+", **self.button_dict)
-        button.bind("<Return>", lambda event: self.add_player())
+        button = self.create_button(text="+", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.add_player())
         self.add_navigation_button(button)
         self.add_row([button])
 
-        button = Button(self.root, text="-", **self.button_dict)
-        button.bind("<Return>", lambda event: self.del_player())
+        button = self.create_button(text="-", **self.button_dict)
+        self.bind_button(button, "<Return>", lambda event: self.del_player())
         self.add_navigation_button(button)
         self.add_row([button])
 
         # Last row
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("SettingPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("SettingPage")
+        )
         self.add_navigation_button(button)
         self.add_row([button])
 
@@ -525,26 +804,41 @@ class PlayerPage(Page):
 
 
 class DevicePage(Page):
+    @staticmethod
+    def device_keys(devices):
+        return [(device["id"], device["name"]) for device in devices]
+
     def setup(self):
         # One row per device
-        for device in self.spotify_manager.devices:
+        devices = self.spotify_manager.devices
+        # (id, name) of the devices the rows are built for
+        self.shown_devices = self.device_keys(devices)
+        for device in devices:
             name = device["name"]
-            button = Button(self.root, text=name, **self.button_dict)
-            button.bind(
-                "<Return>", lambda event, device=device: self.set_device(device)
+            button = self.create_button(text=name, **self.button_dict)
+            self.bind_button(
+                button, "<Return>", lambda event, device=device: self.set_device(device)
             )
             self.add_navigation_button(button)
             self.add_row([button])
 
         # Last row
-        button = Button(self.root, text="Back", **self.button_dict)
-        button.bind("<Return>", lambda event: self.controller.show_frame("SettingPage"))
+        button = self.create_button(text="Back", **self.button_dict)
+        self.bind_button(
+            button, "<Return>", lambda event: self.controller.show_frame("SettingPage")
+        )
         self.add_navigation_button(button)
         self.add_row([button])
 
     def set_device(self, device):
         self.spotify_manager.set_device(device)
-        device_name = device["name"]
-        button_text = f"Device : {device_name}"
-        self.controller.frames["SettingPage"].device_button.config(text=button_text)
+        self.controller.frames["SettingPage"].display_device()
         self.controller.show_frame("SettingPage")
+
+    def devices_changed(self, devices):
+        # is_active flips on every transfer, only rebuild for other devices
+        if self._setup and self.device_keys(devices) == self.shown_devices:
+            return
+        self.reset_setup()
+        if self.controller.active_frame is self:
+            self.show()
@@ -0,0 +1,22 @@
+import time
+
+from models.client import HIGH_PRIORITY, TokenBucket
+
+
+def test_calls_are_not_limited_before_a_429():
+    bucket = TokenBucket(rate=1, burst=1)
+    start = time.monotonic()
+    for call in range(50):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.5
+
+
+def test_retry_after_blocks_then_throttles():
+    bucket = TokenBucket(rate=50, burst=2, cooldown=10)
+    bucket.block(0.1)
+    assert bucket.acquire(HIGH_PRIORITY) >= 0.09
+    start = time.monotonic()
+    for call in range(6):
+        bucket.acquire()
+    # Tokens come back at 50 per second after the delay
+    assert time.monotonic() - start >= 0.08
@@ -0,0 +1,116 @@
+import pytest
+
+from models.game import (
+    COMPLETE_ANSWER_SCORE,
+    RIGHT_ANSWER_SCORE,
+    WRONG_ANSWER_SCORE,
+    GameEngine,
+)
+
+
+class FakePlayback:
+    def __init__(self, songs):
+        self.songs = songs
+        self.current_index = 0
+        self.commands = []
+
+    @property
+    def is_over(self):
+        return self.current_index + 1 >= self.songs
+
+    def next_song(self):
+        self.current_index += 1
+
+    def play(self, callback=None):
+        self.commands.append("play")
+
+    def pause(self):
+        self.commands.append("pause")
+
+    def resume(self):
+        self.commands.append("resume")
+
+
+@pytest.fixture
+def engine(clock):
+    return GameEngine(2, [0, 0], FakePlayback(3), clock=clock)
+
+
+def test_actions_are_gated_by_status(engine):
+    assert not engine.buzz(0)
+    assert not engine.wrong_answer()
+    assert not engine.right_answer()
+    assert not engine.can_go_next
+
+    engine.start_round()
+    assert engine.status == "playing"
+    assert not engine.wrong_answer()
+    assert not engine.right_answer()
+    assert engine.buzz(0)
+    assert not engine.buzz(1)
+    assert not engine.skip()
+    assert engine.playback.commands == ["play", "pause"]
+
+
+def test_wrong_answer_resumes_and_score_never_goes_below_zero(engine):
+    engine.scores[:] = [3, 20]
+    engine.start_round()
+    engine.buzz(0)
+    assert engine.wrong_answer()
+    assert engine.scores == [0, 20]
+    assert engine.status == "playing"
+    assert engine.player_colors == ["black", "black"]
+
+    engine.buzz(1)
+    engine.wrong_answer()
+    assert engine.scores == [0, 20 + WRONG_ANSWER_SCORE]
+    assert engine.playback.commands[-1] == "resume"
+
+
+@pytest.mark.parametrize(
+    "pressed_at, bonus",
+    [(0.5, 5), (3.98, 5), (4.0, 0), (12.0, 0)],
+)
+def test_bonus_uses_the_press_time(engine, clock, pressed_at, bonus):
+    engine.start_round()
+    # The buzz is handled after the arbitration window
+    clock.now = pressed_at + 0.05
+    engine.buzz(0, pressed_at)
+    clock.now += 10
+    assert engine.right_answer()
+    assert engine.scores == [RIGHT_ANSWER_SCORE + bonus, 0]
+
+
+def test_bonus_excludes_time_spent_answering(engine, clock):
+    engine.start_round()
+    clock.now = 1.0
+    engine.buzz(0)
+    clock.now = 30.0
+    engine.wrong_answer()
+    clock.now = 32.0
+    engine.buzz(1)
+    assert engine.timer.elapsed == pytest.approx(3.0)
+    engine.right_answer()
+    assert engine.scores == [0, RIGHT_ANSWER_SCORE + 5]
+
+
+def test_complete_answer(engine, clock):
+    engine.start_round()
+    clock.now = 10.0
+    engine.buzz(1)
+    assert engine.right_answer(complete=True)
+    assert engine.scores == [0, RIGHT_ANSWER_SCORE + COMPLETE_ANSWER_SCORE]
+    assert engine.can_go_next
+
+
+def test_skip_and_next_round_until_over(engine):
+    for round_number in range(2):
+        engine.start_round()
+        assert engine.skip()
+        assert engine.can_go_next
+        assert engine.next_round()
+    engine.start_round()
+    engine.skip()
+    assert not engine.next_round()
+    assert engine.playback.current_index == 2
+    assert engine.status == "waiting"
@@ -0,0 +1,52 @@
+import pytest
+
+from models.helpers import PrefixIndex, Stopwatch, bonus_for
+
+
+def test_stopwatch_pause_at_press_time(clock):
+    stopwatch = Stopwatch(clock)
+    stopwatch.start()
+    clock.now = 2.0
+    stopwatch.pause(at=1.5)
+    assert stopwatch.buzz_time == 1.5
+    clock.now = 5.0
+    stopwatch.resume()
+    clock.now = 6.0
+    assert stopwatch.elapsed == 2.5
+    # A timestamp from the future or before the segment is clamped
+    stopwatch.pause(at=99.0)
+    assert stopwatch.buzz_time == 2.5
+    stopwatch.resume()
+    stopwatch.pause(at=0.0)
+    assert stopwatch.elapsed == 2.5
+
+
+def test_bonus_for_tiers():
+    tiers = [(4, 5), (2, 10)]
+    assert bonus_for(1.99, tiers) == 10
+    assert bonus_for(2.0, tiers) == 5
+    assert bonus_for(4.0, tiers) == 0
+    assert bonus_for(1.0, []) == 0
+
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture
+def index():
+    names = ["Rock 80", "rock 90", "Pop", "Années 80", "Jazz", "Rockabilly"]
+    return PrefixIndex([Named(name) for name in names], lambda item: item.name)
+
+
+def names(index, positions):
+    return [index.items[position].name for position in positions]
+
+
+def test_prefix_index_search(index):
+    assert names(index, index.search("rock")) == ["Rock 80", "rock 90", "Rockabilly"]
+    assert names(index, index.search("ROCK ")) == ["Rock 80", "rock 90"]
+    assert names(index, index.search("an")) == ["Années 80"]
+    assert len(index.search("")) == 6
+    assert len(index.search("zz")) == 0
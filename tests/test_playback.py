@@ -0,0 +1,68 @@
+from models.playback import PlaybackCommand, PlaybackReconciler, PlaybackWorker
+
+
+class FakeState:
+    def __init__(self, state):
+        self.state = state
+
+
+class FakeManager:
+    def __init__(self, state=None):
+        self.playback_state = FakeState(state)
+
+
+def actions(commands):
+    return [command.action for command in commands]
+
+
+def collapse(state, *names):
+    worker = PlaybackWorker(FakeManager(state))
+    commands = [PlaybackCommand(name) for name in names]
+    sent = worker.collapse(commands)
+    skipped = [command.action for command in commands if command.skipped]
+    return actions(sent), skipped
+
+
+def test_play_supersedes_earlier_commands():
+    assert collapse(None, "pause", "play", "pause") == (
+        ["play", "pause"],
+        ["pause"],
+    )
+
+
+def test_only_the_last_toggle_is_sent_when_it_changes_the_state():
+    assert collapse("play", "pause", "resume", "pause") == (
+        ["pause"],
+        ["pause", "resume"],
+    )
+    assert collapse("play", "pause", "resume") == ([], ["pause", "resume"])
+    assert collapse(None, "resume") == (["resume"], [])
+
+
+def test_prepare_is_always_sent():
+    assert collapse("pause", "prepare", "pause") == (["prepare"], ["pause"])
+
+
+class FakeSpotify:
+    def __init__(self, is_playing):
+        self.is_playing = is_playing
+
+    def current_playback(self):
+        return {"is_playing": self.is_playing, "item": None, "device": None}
+
+
+def test_lagging_sample_does_not_undo_a_command():
+    manager = FakeManager()
+    manager.sp = FakeSpotify(is_playing=False)
+    reconciler = PlaybackReconciler(manager, grace=60)
+    reconciler.applied("play")
+    # Spotify still reports the pause sent before the resume
+    reconciler.sample()
+    assert reconciler.state == "play"
+    manager.playback_state = reconciler
+    assert actions(PlaybackWorker(manager).collapse([PlaybackCommand("pause")])) == [
+        "pause"
+    ]
+    reconciler.grace = 0
+    reconciler.sample()
+    assert reconciler.state == "pause"
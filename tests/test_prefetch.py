@@ -0,0 +1,35 @@
+import threading
+
+from models.prefetch import PlaylistPrefetcher
+
+
+class Manager:
+    active_playlist = None
+
+
+class Playlist:
+    def __init__(self):
+        self.pages = []
+
+    def fetch_page(self, limit, offset):
+        self.pages.append(offset)
+        return {"items": []}
+
+
+def test_page_requests_wait_while_a_round_plays_another_playlist():
+    manager = Manager()
+    prefetcher = PlaylistPrefetcher(manager)
+    background, played = Playlist(), Playlist()
+    manager.active_playlist = played
+    prefetcher.pause()
+
+    prefetcher.paused_fetch(played)(100, 0)
+    assert played.pages == [0]
+
+    thread = threading.Thread(target=prefetcher.paused_fetch(background), args=(100, 0))
+    thread.start()
+    thread.join(0.1)
+    assert background.pages == []
+    prefetcher.resume()
+    thread.join(5)
+    assert background.pages == [0]
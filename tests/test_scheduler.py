@@ -0,0 +1,47 @@
+import pytest
+
+from utils import Scheduler
+
+
+@pytest.fixture
+def scheduler(root, clock):
+    return Scheduler(root, clock)
+
+
+def advance(root, clock, seconds):
+    clock.now += seconds
+    root.run_pending()
+
+
+def test_key_replaces_pending_timer(scheduler, root, clock):
+    calls = []
+    scheduler.schedule("go", 1, calls.append, "first")
+    scheduler.schedule("go", 1, calls.append, "second")
+    assert scheduler.live == 1
+    advance(root, clock, 1)
+    assert calls == ["second"]
+    assert scheduler.live == 0
+
+
+def test_repeating_timer_keeps_its_deadlines(scheduler, root, clock):
+    ticks = []
+    scheduler.every("tick", 1, lambda: ticks.append(clock.now))
+    for late in (1.3, 0.9, 1.0):
+        advance(root, clock, late)
+    assert ticks == pytest.approx([1.3, 2.2, 3.2])
+    assert scheduler.timers["tick"].deadline == 4
+    # Runs missed while the loop was busy are dropped
+    advance(root, clock, 3.5)
+    assert len(ticks) == 4
+    assert scheduler.timers["tick"].deadline == 7
+
+
+def test_owner_timers_are_cancelled_together(scheduler, root, clock):
+    calls = []
+    page, other = object(), object()
+    scheduler.group(page).schedule("a", 1, calls.append, "a")
+    scheduler.group(page).every("b", 1, calls.append, "b")
+    scheduler.group(other).schedule("a", 1, calls.append, "other")
+    assert scheduler.group(page).cancel_all() == 2
+    advance(root, clock, 1)
+    assert calls == ["other"]
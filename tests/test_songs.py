@@ -0,0 +1,75 @@
+import random
+import threading
+
+from models.cache import NullCache
+from models.songs import SongStore, parse_year
+from models.spotify import SpotifyPlaylist
+
+
+def test_parse_year():
+    assert parse_year("1999-05-01") == 1999
+    assert parse_year("1987") == 1987
+    assert parse_year("") == 0
+    assert parse_year(None) == 0
+
+
+def test_song_store_rows_round_trip():
+    rows = [
+        ["spotify:track:abc", "Song", "Artist", 1999],
+        ["spotify:local:Artist:Album:Local+song:180", "Local", "Artist", 0],
+    ]
+    store = SongStore(rows)
+    assert len(store) == 2
+    assert store.rows() == rows
+    assert store.ids[0] == "abc"
+    assert store[0].uri == "spotify:track:abc"
+    assert store[0].details == "Artist - Song - 1999"
+    assert store[-1].details == "Artist - Local"
+    assert store.artists[0] is store.artists[1]
+    assert [song.name for song in store[0:2]] == ["Song", "Local"]
+    assert len(random.sample(store, 2)) == 2
+
+
+class Manager:
+    sp = None
+    catalog_cache = NullCache()
+    active_playlist = None
+
+
+class SlowPlaylist(SpotifyPlaylist):
+    """Loads one song named after the snapshot, once allowed to"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.proceed = threading.Event()
+
+    def fetch_songs(self, snapshot_id, fetch):
+        self.proceed.wait(5)
+        self.add_songs([[f"spotify:track:{snapshot_id}", snapshot_id, "Artist", 0]])
+
+
+def test_snapshot_change_during_a_load_reloads_the_songs():
+    playlist = SlowPlaylist(Manager(), "mbt_Playlist", "spotify:playlist:1", "old")
+    playlist.preload()
+    playlist.update("mbt_Playlist", "new", 1)
+    playlist.proceed.set()
+    assert [song.name for song in playlist.songs] in (["old"], ["new"])
+    playlist._loader.join(5)
+    assert [song.name for song in playlist.songs] == ["new"]
+
+
+class SlowSamplePlaylist(SlowPlaylist):
+    def fetch_sample(self, rng, sample_size):
+        self.proceed.wait(5)
+        return SongStore([["spotify:track:a", "Sampled", "Artist", 0]])
+
+
+def test_quick_game_never_waits_for_the_sample_on_is_over():
+    playlist = SlowSamplePlaylist(
+        Manager(), "mbt_Playlist", "spotify:playlist:1", "old", total=50
+    )
+    playlist.start_game(sample_size=3)
+    assert playlist.is_over is False
+    playlist.proceed.set()
+    assert [song.name for song in playlist.sequence] == ["Sampled"]
+    assert playlist.is_over is True
@@ -0,0 +1,53 @@
+from concurrent.futures import Future
+
+import pytest
+
+from utils import Dispatcher, Scheduler, TaskRunner
+
+
+@pytest.fixture
+def scheduler(root, clock):
+    return Scheduler(root, clock)
+
+
+def advance(root, clock, seconds):
+    clock.now += seconds
+    root.run_pending()
+
+
+def test_task_waits_for_delays_and_futures(scheduler, root, clock):
+    dispatcher = Dispatcher()
+    runner = TaskRunner(scheduler, dispatcher)
+    future = Future()
+    steps = []
+
+    def task():
+        steps.append("start")
+        yield 1
+        steps.append("waited")
+        value = yield future
+        steps.append(value)
+        return "done"
+
+    task = runner.spawn(task())
+    assert steps == ["start"]
+    advance(root, clock, 1)
+    assert steps == ["start", "waited"]
+    future.set_result(42)
+    dispatcher.drain()
+    assert steps == ["start", "waited", 42]
+    assert task.done and task.result == "done"
+
+
+def test_cancelled_task_never_resumes(scheduler, root, clock):
+    runner = TaskRunner(scheduler, Dispatcher())
+    steps = []
+
+    def task():
+        yield 1
+        steps.append("resumed")
+
+    runner.cancel(runner.spawn(task()))
+    advance(root, clock, 1)
+    assert steps == []
+    assert scheduler.live == 0
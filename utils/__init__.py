@@ -1 +1,5 @@
-from .sound import play_sound  # noqa
+from .sound import play_sound, sound_engine  # noqa
+from .dispatch import Dispatcher  # noqa
+from .scheduler import Scheduler  # noqa
+from .tasks import TaskRunner  # noqa
+from .metrics import InstrumentedClient, metrics  # noqa
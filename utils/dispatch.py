@@ -0,0 +1,26 @@
+import queue
+
+
+class Dispatcher:
+    """Hand callbacks from worker threads over to the Tk thread.
+
+    Tk widgets must only be touched from the main thread, so workers queue
+    their callbacks here and the Tk loop drains them.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def call_soon(self, callback, *args):
+        self._queue.put((callback, args))
+
+    def drain(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def attach(self, scheduler, interval=0.02):
+        scheduler.every("dispatcher", interval, self.drain)
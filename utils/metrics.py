@@ -0,0 +1,117 @@
+import config
+import json
+import logging
+import platform
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Durations of one operation; percentiles use the last `size` samples"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+    def add(self, duration, slow=False):
+        self.samples.append(duration)
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if slow:
+            self.slow += 1
+
+    def percentile(self, ratio):
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * ratio))]
+
+    @property
+    def summary(self):
+        return {
+            "count": self.count,
+            "slow": self.slow,
+            "mean": self.total / self.count,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Timing histograms per operation name, safe to use from any thread"""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration, slow_threshold=None):
+        slow = slow_threshold is not None and duration > slow_threshold
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.size)
+            histogram.add(duration, slow)
+        if slow:
+            logger.warning("Slow %s: %.0f ms", name, duration * 1000)
+
+    @contextmanager
+    def timed(self, name, slow_threshold=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, slow_threshold)
+
+    def wrap(self, name, function, slow_threshold=None):
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            with self.timed(name, slow_threshold):
+                return function(*args, **kwargs)
+
+        return timed_function
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.summary for name, h in sorted(self.histograms.items())}
+
+    def dump(self, path):
+        """Append one JSON line per operation to path"""
+        date = time.strftime("%Y-%m-%dT%H:%M:%S")
+        host = platform.node()
+        with open(path, "a") as metrics_file:
+            for name, summary in self.snapshot().items():
+                line = dict(date=date, host=host, venue=config.VENUE, name=name)
+                line.update(summary)
+                metrics_file.write(json.dumps(line) + "\n")
+        logger.info("Metrics written to %s", path)
+
+
+class InstrumentedClient:
+    """Proxy timing every public method call of the wrapped client"""
+
+    def __init__(self, client, metrics, prefix, slow_threshold=None):
+        self._client = client
+        self._metrics = metrics
+        self._prefix = prefix
+        self._slow_threshold = slow_threshold
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+        return self._metrics.wrap(
+            f"{self._prefix}.{name}", attribute, self._slow_threshold
+        )
+
+
+metrics = Metrics(config.METRICS_HISTORY)
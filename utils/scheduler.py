@@ -0,0 +1,143 @@
+import heapq
+import itertools
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    def __init__(self, key, deadline, callback, args, interval, owner):
+        self.key = key
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.owner = owner
+        self.cancelled = False
+
+
+class Scheduler:
+    """Every timer of the game, run from a single Tk after() call.
+
+    Timers are due at deadlines on a monotonic clock. A repeating timer is
+    due every interval after its first deadline, so late runs never add up
+    to a drift, and runs missed while the loop was busy are dropped. Timers
+    are keyed: scheduling a key again replaces its pending timer. A timer
+    can belong to an owner, all of its timers are cancelled with
+    cancel_owner.
+    """
+
+    def __init__(self, root, clock=time.monotonic):
+        self.root = root
+        self.clock = clock
+        self.timers = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._after = None
+        self._after_deadline = None
+
+    @property
+    def live(self):
+        """Number of pending timers"""
+        return len(self.timers)
+
+    def schedule(self, key, delay, callback, *args, owner=None):
+        """Call callback(*args) in delay seconds"""
+        self.add(Timer(key, self.clock() + delay, callback, args, None, owner))
+
+    def every(self, key, interval, callback, *args, owner=None):
+        """Call callback(*args) every interval seconds, until cancelled"""
+        deadline = self.clock() + interval
+        self.add(Timer(key, deadline, callback, args, interval, owner))
+
+    def add(self, timer):
+        self.cancel(timer.key)
+        self.timers[timer.key] = timer
+        self.push(timer)
+
+    def push(self, timer):
+        heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+        self.arm()
+
+    def cancel(self, key):
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+        timer.cancelled = True
+        return True
+
+    def cancel_owner(self, owner):
+        keys = [key for key, timer in self.timers.items() if timer.owner is owner]
+        for key in keys:
+            self.cancel(key)
+        return len(keys)
+
+    def group(self, owner):
+        return TimerGroup(self, owner)
+
+    def arm(self):
+        """Have Tk call run_due at the earliest deadline"""
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        deadline = self._heap[0][0]
+        if self._after is not None:
+            if self._after_deadline <= deadline:
+                return
+            self.root.after_cancel(self._after)
+        delay = max(0, math.ceil((deadline - self.clock()) * 1000))
+        self._after = self.root.after(delay, self.run_due)
+        self._after_deadline = deadline
+
+    def run_due(self):
+        self._after = None
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            timer = heapq.heappop(self._heap)[2]
+            if timer.cancelled:
+                continue
+            due.append(timer)
+            if timer.interval is None:
+                del self.timers[timer.key]
+            else:
+                missed = math.floor((now - timer.deadline) / timer.interval)
+                timer.deadline += (missed + 1) * timer.interval
+                heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+
+        for timer in due:
+            # An earlier callback of this run may have cancelled it
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception:  # a failing timer must not stop the others
+                logger.exception("Timer %s failed", timer.key)
+        self.arm()
+
+
+class TimerGroup:
+    """Timers of one owner, keyed by name"""
+
+    def __init__(self, scheduler, owner):
+        self.scheduler = scheduler
+        self.owner = owner
+
+    def schedule(self, name, delay, callback, *args):
+        self.scheduler.schedule(
+            (id(self.owner), name), delay, callback, *args, owner=self.owner
+        )
+
+    def every(self, name, interval, callback, *args):
+        self.scheduler.every(
+            (id(self.owner), name), interval, callback, *args, owner=self.owner
+        )
+
+    def cancel(self, name):
+        return self.scheduler.cancel((id(self.owner), name))
+
+    def cancel_all(self):
+        return self.scheduler.cancel_owner(self.owner)
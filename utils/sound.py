@@ -1,5 +1,81 @@
-from playsound import playsound
+import config
+import logging
+import os
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SOUNDS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sounds"
+)
+SOUND_EXTENSIONS = (".wav", ".mp3", ".ogg")
+
+
+class SoundEngine:
+    """Play preloaded sound effects through a single mixer output.
+
+    Every file of the sounds directory is decoded once. Effects are mixed on
+    a fixed number of channels: when all of them are busy the new effect is
+    dropped, and a repeated trigger of an effect inside merge_window seconds
+    is merged with the previous one.
+    """
+
+    def __init__(self, directory=SOUNDS_DIRECTORY, channels=8, merge_window=0.08):
+        self.directory = directory
+        self.channels = channels
+        self.merge_window = merge_window
+        self.sounds = {}
+        self.last_played = {}
+        self.started = False
+        self.enabled = False
+
+    def start(self):
+        if self.started:
+            return
+        self.started = True
+        try:
+            # A small buffer keeps the delay between key press and sound short
+            pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
+            pygame.mixer.init()
+        except pygame.error as error:
+            logger.warning("Sound disabled: %s", error)
+            return
+        pygame.mixer.set_num_channels(self.channels)
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.lower().endswith(SOUND_EXTENSIONS):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                self.sounds[filename] = pygame.mixer.Sound(path)
+            except pygame.error as error:
+                logger.warning("Unable to load %s: %s", path, error)
+        self.enabled = True
+
+    def play(self, name):
+        self.start()
+        key = os.path.basename(name)
+        sound = self.sounds.get(key)
+        if not self.enabled or sound is None:
+            return
+
+        now = time.monotonic()
+        last_played = self.last_played.get(key)
+        if last_played is not None and now - last_played < self.merge_window:
+            return
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            return
+        self.last_played[key] = now
+        channel.play(sound)
+
+
+sound_engine = SoundEngine(
+    channels=config.SOUND_CHANNELS, merge_window=config.SOUND_MERGE_WINDOW
+)
 
 
 def play_sound(name, block=False):
-    playsound(name, False)
+    sound_engine.play(name)
@@ -0,0 +1,76 @@
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    def __init__(self, steps):
+        self.steps = steps
+        self.key = ("task", id(self))
+        self.done = False
+        self.result = None
+
+
+class TaskRunner:
+    """Run generator tasks cooperatively on the Scheduler.
+
+    A task yields what it waits for: a number of seconds, or a
+    concurrent.futures.Future whose result is sent back into it. It is
+    always resumed on the Tk thread, and the loop keeps handling key
+    presses while it waits.
+    """
+
+    def __init__(self, scheduler, dispatcher):
+        self.scheduler = scheduler
+        self.dispatcher = dispatcher
+        self.tasks = set()
+
+    def spawn(self, steps):
+        task = Task(steps)
+        self.tasks.add(task)
+        self.step(task)
+        return task
+
+    def cancel(self, task):
+        if task.done:
+            return
+        self.scheduler.cancel(task.key)
+        self.finish(task)
+        task.steps.close()
+
+    def finish(self, task, result=None):
+        task.done = True
+        task.result = result
+        self.tasks.discard(task)
+
+    def step(self, task, value=None, error=None):
+        if task.done:
+            return
+        try:
+            if error is not None:
+                awaited = task.steps.throw(error)
+            else:
+                awaited = task.steps.send(value)
+        except StopIteration as stop:
+            self.finish(task, stop.value)
+            return
+        except Exception:  # a failing task must not break the Tk loop
+            logger.exception("Task %s failed", task.steps.__name__)
+            self.finish(task)
+            return
+
+        if isinstance(awaited, Future):
+            awaited.add_done_callback(
+                lambda future: self.dispatcher.call_soon(self.wake, task, future)
+            )
+        else:
+            self.scheduler.schedule(task.key, awaited or 0, self.step, task)
+
+    def wake(self, task, future):
+        try:
+            value = future.result()
+        except Exception as error:
+            self.step(task, error=error)
+        else:
+            self.step(task, value)